@@ -0,0 +1,236 @@
+"""性能基准：在 PlantsVsZombies 上搭建固定场景，测量无界面模拟步速、每帧绘制耗时与内存峰值，
+并与保存的基准结果比较，超出容差的指标记为退步。
+
+示例:
+    python pvz_bench.py --save-baseline              # 在本机记录基准
+    python pvz_bench.py --tolerance 0.1              # 与基准比较，有退步时退出码为 1
+    python pvz_bench.py --scenarios horde --repeat 5
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# 基准在无窗口环境下运行，绘制到虚拟显示设备
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from pvz_core import Simulation, Zombie, FastZombie, TankZombie
+from pvz_render import Renderer, DirtyRectRenderer
+from pvz_sweep import DECISION_INTERVAL, strategy_greedy
+
+game_module = importlib.import_module('植物大战僵尸')
+PlantsVsZombies = game_module.PlantsVsZombies
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+# 指标 -> 数值越大越好为 True
+METRICS = {'ticks_per_s': True, 'draw_ms': False, 'peak_kib': False}
+
+
+def new_game(level='normal', seed=0, rows=None, cols=None):
+    """已进入关卡、阳光充足且不会自行结束的对局。"""
+    game = PlantsVsZombies(seed, rows=rows, cols=cols)
+    game.start_level(level)
+    game.show_menu = False
+    game.sun_count = 10**6
+    game.max_waves = 10**9
+    return game
+
+
+def fill(game, kind, cols=None):
+    for row in range(game.board.rows):
+        for col in cols or range(game.board.cols):
+            game.place_plant(kind, row, col)
+
+
+def scatter_zombies(game, n, spread=300):
+    """在各行出生点左侧 spread 像素内散布 n 个普通/快速/重装僵尸。"""
+    kinds = (Zombie, FastZombie, TankZombie)
+    for i in range(n):
+        zombie = kinds[i % len(kinds)](i % game.board.rows, game.rng)
+        zombie.x = game.board.spawn_x - game.rng.uniform(0, spread)
+        game.add_zombie(zombie)
+    game.lanes.reindex()
+
+
+def scenario_peashooters():
+    """45 株豌豆射手对持续出现的僵尸。"""
+    game = new_game('hard')
+    fill(game, 'peashooter')
+    scatter_zombies(game, 60)
+    return game
+
+
+def scenario_horde():
+    """500 个混合僵尸冲击三列豌豆射手和一列坚果墙。"""
+    game = new_game('normal')
+    fill(game, 'peashooter', range(3))
+    fill(game, 'wallnut', range(5, 6))
+    scatter_zombies(game, 500, spread=400)
+    return game
+
+
+def scenario_sun_flood():
+    """种满向日葵，场上另有大量下落中的阳光。"""
+    game = new_game('easy')
+    fill(game, 'sunflower')
+    for plant in game.plants:
+        plant.last_generation = -plant.sun_generation_time  # 立即开始产阳光
+        game.schedule_plant(plant)
+    for _ in range(300):
+        game.add_sun(game.sun_pool.acquire(game.rng.randint(100, game.board.width - 100), -20,
+                                           rng=game.rng, fall_range=game.board.sun_fall_range))
+    return game
+
+
+def scenario_endurance():
+    """20x200 的耐力模式草坪，每三列一列豌豆射手，2000 个僵尸分布在整片草坪上。"""
+    game = new_game('hard', rows=20, cols=200)
+    fill(game, 'peashooter', range(0, game.board.cols, 3))
+    scatter_zombies(game, 2000, spread=game.board.spawn_x - 100)
+    return game
+
+
+def scenario_hard_waves():
+    """困难关卡完整的 7 波，由贪心策略种植。"""
+    game = PlantsVsZombies(0)
+    game.start_level('hard')
+    game.show_menu = False
+    return game
+
+
+# 名称 -> (搭建函数, 最多模拟步数, 种植策略)
+SCENARIOS = {
+    'peashooters': (scenario_peashooters, 900, None),
+    'horde': (scenario_horde, 600, None),
+    'sun_flood': (scenario_sun_flood, 600, None),
+    'endurance': (scenario_endurance, 300, None),
+    'hard_waves': (scenario_hard_waves, 20000, strategy_greedy),
+}
+
+
+def run_ticks(game, ticks, strategy=None):
+    """无界面推进至多 ticks 步，返回实际步数。"""
+    done = 0
+    while done < ticks and not (game.game_over or game.game_win):
+        if strategy is not None and done % DECISION_INTERVAL == 0:
+            strategy(game, done, {})
+        Simulation.update(game)
+        done += 1
+    return done
+
+
+def measure_update(name, repeat):
+    build, ticks, strategy = SCENARIOS[name]
+    best = 0.0
+    for _ in range(repeat):
+        game = build()
+        start = time.perf_counter()
+        done = run_ticks(game, ticks, strategy)
+        best = max(best, done / (time.perf_counter() - start))
+    return best
+
+
+def measure_draw(name, repeat, frames, renderer_cls):
+    """先推进一段使场面铺开，再逐帧推进一步并只对绘制计时。"""
+    build, ticks, strategy = SCENARIOS[name]
+    screen = game_module.screen or game_module.init_display()
+    best = None
+    for _ in range(repeat):
+        game = build()
+        game.renderer = renderer_cls()
+        run_ticks(game, min(ticks, 300), strategy)
+        game.draw(screen)  # 预热精灵与背景缓存
+        elapsed = 0.0
+        for _ in range(frames):
+            Simulation.update(game)
+            start = time.perf_counter()
+            game.draw(screen)
+            elapsed += time.perf_counter() - start
+        ms = elapsed * 1000 / frames
+        best = ms if best is None else min(best, ms)
+    return best
+
+
+def measure_memory(name):
+    """搭建场景并跑完全部步数期间 Python 分配的内存峰值(KiB)。"""
+    build, ticks, strategy = SCENARIOS[name]
+    tracemalloc.start()
+    try:
+        run_ticks(build(), ticks, strategy)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_suite(names, repeat=3, frames=120, renderer_cls=Renderer):
+    results = {}
+    for name in names:
+        results[name] = {
+            'ticks_per_s': measure_update(name, repeat),
+            'draw_ms': measure_draw(name, repeat, frames, renderer_cls),
+            'peak_kib': measure_memory(name),
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """返回退步列表 [(场景, 指标, 基准值, 当前值, 变化比例)]。"""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, higher_is_better in METRICS.items():
+            base = baseline.get(name, {}).get(metric)
+            if not base:
+                continue
+            change = metrics[metric] / base - 1
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append((name, metric, base, metrics[metric], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='植物大战僵尸性能基准')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=3, help='计时取多次中的最好结果')
+    parser.add_argument('--frames', type=int, default=120, help='每次测量绘制的帧数')
+    parser.add_argument('--dirty-rects', action='store_true', help='测量脏矩形绘制器')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果写为基准')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='允许的退步比例')
+    parser.add_argument('--out', help='把本次结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    renderer_cls = DirtyRectRenderer if args.dirty_rects else Renderer
+    results = run_suite(args.scenarios, args.repeat, args.frames, renderer_cls)
+    for name, m in results.items():
+        print(f"{name:<12} {m['ticks_per_s']:10.0f} 步/秒  {m['draw_ms']:7.2f} ms/帧  "
+              f"{m['peak_kib']:9.0f} KiB")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"基准已写入 {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("没有基准文件，使用 --save-baseline 记录")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, base, value, change in regressions:
+        print(f"退步: {name} {metric} {base:.2f} -> {value:.2f} ({change:+.1%})")
+    if not regressions:
+        print(f"与基准相比没有超过 {args.tolerance:.0%} 的退步")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1379 @@
+"""植物大战僵尸的纯逻辑核心：只保存游戏状态并推进模拟，不依赖 pygame。"""
+import copy
+import heapq
+import math
+import random
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+# 世界尺寸(与默认窗口一致，僵尸出生与子弹消失都以此为界)
+SCREEN_WIDTH = 900
+SCREEN_HEIGHT = 600
+
+# 游戏参数
+GRID_SIZE = 80  # 格子大小
+GRID_ROWS = 5  # 网格行数
+GRID_COLS = 9  # 网格列数
+GRID_OFFSET_X = 50  # 网格X偏移
+GRID_OFFSET_Y = 100  # 网格Y偏移
+SUN_FALL_SPEED = 2  # 阳光下落速度
+SUN_GENERATION_TIME = 5  # 阳光生成时间间隔(秒)
+ZOMBIE_GENERATION_TIME = 10  # 僵尸生成初始时间间隔(秒)
+LAWN_MOWER_SPEED = 14  # 小推车速度
+SUN_VALUE = 25  # 每个阳光的价值
+TICK_RATE = 30  # 每秒模拟步数，移动速度与伤害均按步计算
+
+# 网格右侧与下方留出的空地(与默认窗口一致)，僵尸在右侧空地出生
+BOARD_MARGIN_RIGHT = SCREEN_WIDTH - GRID_OFFSET_X - GRID_COLS * GRID_SIZE
+BOARD_MARGIN_BOTTOM = SCREEN_HEIGHT - GRID_OFFSET_Y - GRID_ROWS * GRID_SIZE
+
+# 关卡参数
+LEVEL_PRESETS = {
+    'easy': {'max_waves': 4, 'zombie_interval': 10},
+    'normal': {'max_waves': 5, 'zombie_interval': 8},
+    'hard': {'max_waves': 7, 'zombie_interval': 6},
+}
+
+
+def fork_rng(rng):
+    """复制随机数发生器及其状态；不经过 __init__，省去从系统熵源取种子。"""
+    child = type(rng).__new__(type(rng))
+    child.setstate(rng.getstate())
+    return child
+
+
+class SimClock:
+    """固定步长的模拟时钟，时间只随 advance() 前进，与真实时间无关。"""
+
+    def __init__(self, tick_rate=TICK_RATE):
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.ticks = 0
+
+    @property
+    def now(self):
+        # 用整数步数换算，避免浮点累加误差
+        return self.ticks / self.tick_rate
+
+    def advance(self, ticks=1):
+        self.ticks += ticks
+
+
+class Board:
+    """草坪行列数及由此确定的世界范围。
+
+    模拟只使用世界坐标；默认 5x9 草坪的世界恰好是 900x600，与窗口重合，
+    更大的草坪由绘制层的摄像机决定显示哪一部分。
+    """
+
+    def __init__(self, rows=GRID_ROWS, cols=GRID_COLS):
+        self.rows = rows
+        self.cols = cols
+        self.width = GRID_OFFSET_X + cols * GRID_SIZE + BOARD_MARGIN_RIGHT
+        self.height = GRID_OFFSET_Y + rows * GRID_SIZE + BOARD_MARGIN_BOTTOM
+        self.spawn_x = self.width - 50  # 僵尸出生位置
+        # 天降阳光停留的高度范围
+        self.sun_fall_range = (GRID_OFFSET_Y + GRID_SIZE // 2 + 10,
+                               GRID_OFFSET_Y + rows * GRID_SIZE - GRID_SIZE // 2 - 10)
+
+    def contains(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+
+class LaneIndex:
+    """按行维护僵尸列表，每行按 x 从小到大排序，并同步保存 x 坐标用于二分查找。"""
+
+    def __init__(self, rows):
+        self.lanes = [[] for _ in range(rows)]
+        self.xs = [[] for _ in range(rows)]
+
+    def add(self, zombie):
+        lane, xs = self.lanes[zombie.row], self.xs[zombie.row]
+        i = bisect_right(xs, zombie.x)
+        lane.insert(i, zombie)
+        xs.insert(i, zombie.x)
+
+    def remove(self, zombie):
+        lane, xs = self.lanes[zombie.row], self.xs[zombie.row]
+        # 僵尸只会向左移动，自上次排序后的位置不会在当前 x 之前
+        try:
+            i = lane.index(zombie, bisect_left(xs, zombie.x))
+        except ValueError:
+            i = lane.index(zombie)
+        del lane[i]
+        del xs[i]
+
+    def fork(self):
+        child = LaneIndex.__new__(LaneIndex)
+        child.lanes = [lane[:] for lane in self.lanes]
+        child.xs = [xs[:] for xs in self.xs]
+        return child
+
+    def count(self, row):
+        """该行是否有僵尸只需看计数。"""
+        return len(self.lanes[row])
+
+    def reindex(self):
+        """僵尸移动后重新排序；各行几乎有序，排序接近线性。"""
+        for row, lane in enumerate(self.lanes):
+            lane.sort(key=lambda z: z.x)
+            self.xs[row] = [z.x for z in lane]
+
+    def leftmost(self, row):
+        lane = self.lanes[row]
+        return lane[0] if lane else None
+
+    def first_in_range(self, row, lo, hi):
+        """返回该行 x 落在 [lo, hi] 内最靠左的僵尸。"""
+        xs = self.xs[row]
+        i = bisect_left(xs, lo)
+        if i < len(xs) and xs[i] <= hi:
+            return self.lanes[row][i]
+        return None
+
+    def in_range(self, row, lo, hi):
+        """返回该行 x 落在 [lo, hi] 内的所有僵尸。"""
+        xs = self.xs[row]
+        return self.lanes[row][bisect_left(xs, lo):bisect_right(xs, hi)]
+
+
+# 句柄低位是槽位号，高位是该槽位的代数
+HANDLE_SLOT_BITS = 32
+HANDLE_SLOT_MASK = (1 << HANDLE_SLOT_BITS) - 1
+
+_entity_slots = {}
+
+
+def entity_slots(cls):
+    """类及其父类声明的全部槽位。"""
+    names = _entity_slots.get(cls)
+    if names is None:
+        names = _entity_slots[cls] = tuple(
+            name for klass in reversed(cls.__mro__) for name in getattr(klass, '__slots__', ()))
+    return names
+
+
+def copy_entity(entity):
+    cls = type(entity)
+    copied = cls.__new__(cls)
+    for name in entity_slots(cls):
+        setattr(copied, name, getattr(entity, name))
+    return copied
+
+
+class EntityStore:
+    """按插入顺序保存实体，删除与按句柄查找都是常数时间。
+
+    每个实体占用一个槽位，句柄由槽位号和代数组成；槽位释放后代数加一，
+    旧句柄随之失效，不会误指向之后复用该槽位的实体。删除只在顺序表中留空，
+    compact() 每步结束时按原顺序一次性压缩。
+
+    fork() 得到的副本与原容器共享实体。实体的 owner 记录它属于哪个容器，
+    改写实体前要先经过 own()，不属于本容器的实体在那时才复制一份换入。
+    """
+
+    def __init__(self):
+        self.order = []  # 插入顺序，已删除的位置为 None
+        self.slots = []
+        self.gens = []
+        self.free = []
+        self.n = 0
+        self.token = object()  # 本容器的实体的 owner
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        # 遍历开始时的快照：循环中删除或新增实体不影响本次遍历
+        return filter(None, self.order[:])
+
+    def __contains__(self, entity):
+        return self.get(entity.handle) is entity
+
+    def append(self, entity):
+        if self.free:
+            slot = self.free.pop()
+            self.slots[slot] = entity
+        else:
+            slot = len(self.slots)
+            self.slots.append(entity)
+            self.gens.append(0)
+        entity.handle = self.gens[slot] << HANDLE_SLOT_BITS | slot
+        entity.index = len(self.order)
+        entity.owner = self.token
+        self.order.append(entity)
+        self.n += 1
+
+    def remove(self, entity):
+        slot = entity.handle & HANDLE_SLOT_MASK
+        self.slots[slot] = None
+        self.gens[slot] += 1
+        self.free.append(slot)
+        self.order[entity.index] = None
+        self.n -= 1
+
+    def get(self, handle):
+        """按句柄取实体，实体已被删除时返回 None。"""
+        slot = handle & HANDLE_SLOT_MASK
+        if slot < len(self.gens) and self.gens[slot] == handle >> HANDLE_SLOT_BITS:
+            return self.slots[slot]
+        return None
+
+    def owns(self, entity):
+        return entity.owner is self.token
+
+    def own(self, entity):
+        """返回可以原地改写的实体：与分叉出的容器共享时先复制一份换入。"""
+        if entity.owner is self.token:
+            return entity
+        copied = self.adopt(entity)
+        self.order[entity.index] = copied
+        return copied
+
+    def adopt(self, entity):
+        copied = copy_entity(entity)
+        copied.owner = self.token
+        self.slots[entity.handle & HANDLE_SLOT_MASK] = copied
+        return copied
+
+    def compact(self):
+        """压缩顺序表，返回因下标改变而复制换入的共享实体。"""
+        if len(self.order) == self.n:
+            return ()
+        order = self.order = [e for e in self.order if e is not None]
+        adopted = []
+        for i, entity in enumerate(order):
+            if entity.index != i:
+                if entity.owner is not self.token:
+                    entity = order[i] = self.adopt(entity)
+                    adopted.append(entity)
+                entity.index = i
+        return adopted
+
+    def fork(self):
+        """返回共享全部实体的副本；此后双方的实体都视为共享，改写前各自复制。"""
+        child = type(self).__new__(type(self))
+        child.order = self.order[:]
+        child.slots = self.slots[:]
+        child.gens = self.gens[:]
+        child.free = self.free[:]
+        child.n = self.n
+        child.token = object()
+        self.token = object()
+        return child
+
+
+class RowStore(EntityStore):
+    """另按行登记句柄的 EntityStore，只关心少数几行时(如绘制视口)不必遍历全部实体。
+
+    实体加入后不能再换行。
+    """
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = [set() for _ in range(rows)]
+
+    def append(self, entity):
+        super().append(entity)
+        self.rows[entity.row].add(entity.handle)
+
+    def remove(self, entity):
+        self.rows[entity.row].discard(entity.handle)
+        super().remove(entity)
+
+    def in_rows(self, rows):
+        """给定各行的实体，按插入顺序排列。"""
+        found = [self.get(handle) for row in rows for handle in self.rows[row]]
+        found.sort(key=attrgetter('index'))
+        return found
+
+    def fork(self):
+        child = super().fork()
+        child.rows = [set(row) for row in self.rows]
+        return child
+
+
+class PlantGrid:
+    """网格占用表：每格至多一株植物，放置、接触查找与移除都只看固定几个格子。
+
+    plants 按种植顺序保存全部植物，更新与绘制沿用这一顺序。
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.cells = [[None] * cols for _ in range(rows)]
+        self.plants = EntityStore()
+
+    def __contains__(self, plant):
+        return self.cells[plant.row][plant.col] is plant
+
+    def __len__(self):
+        return len(self.plants)
+
+    def get(self, row, col):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.cells[row][col]
+        return None
+
+    def add(self, plant):
+        self.cells[plant.row][plant.col] = plant
+        self.plants.append(plant)
+
+    def remove(self, plant):
+        self.cells[plant.row][plant.col] = None
+        self.plants.remove(plant)
+
+    def own(self, plant):
+        """返回可以原地改写的植物，格子随之指向它。"""
+        if self.plants.owns(plant):
+            return plant
+        plant = self.plants.own(plant)
+        self.cells[plant.row][plant.col] = plant
+        return plant
+
+    def compact(self):
+        for plant in self.plants.compact():
+            self.cells[plant.row][plant.col] = plant
+
+    def fork(self):
+        child = PlantGrid.__new__(PlantGrid)
+        child.rows = self.rows
+        child.cols = self.cols
+        child.cells = [row[:] for row in self.cells]
+        child.plants = self.plants.fork()
+        return child
+
+    def blocking_plant(self, row, x):
+        """返回挡住位于 x 的僵尸的植物(plant.x < x < plant.x + GRID_SIZE + 10)。
+
+        满足条件的只可能是僵尸所在格或其左侧一格，两者都有时取靠右的一株，
+        即僵尸向左行进时先碰到的那株。
+        """
+        col = int((x - GRID_OFFSET_X) // GRID_SIZE)
+        for c in (col, col - 1):
+            plant = self.get(row, c)
+            if plant is not None and x - (plant.x + GRID_SIZE) < 10 and x > plant.x:
+                return plant
+        return None
+
+    def contact_step(self, row, x, speed, steps):
+        """从 x 每小步向左走 speed 的僵尸在第几小步(从 1 起)首次被挡住，steps 步内碰不到时返回 None。
+
+        挡住的条件同 blocking_plant；只看途经的格子，按从右到左的顺序第一株碰到的即是。
+        """
+        cells = self.cells[row]
+        col = min(int((x - GRID_OFFSET_X) // GRID_SIZE), self.cols - 1)
+        last = max(int((x - speed * steps - GRID_OFFSET_X) // GRID_SIZE) - 1, 0)
+        for c in range(col, last - 1, -1):
+            plant = cells[c]
+            if plant is None:
+                continue
+            k = max(1, math.floor((x - plant.x - GRID_SIZE - 10) / speed) + 1)
+            if k <= steps and self.blocking_plant(row, x - speed * k) is plant:
+                return k
+        return None
+
+
+class SpatialHash:
+    """均匀网格空间哈希：圆形实体按包围盒登记到它覆盖的格子，点查询只看一个格子。
+
+    只登记不再移动的实体；格子边长不小于直径时每个实体至多占 2x2 个格子。
+    """
+
+    def __init__(self, cell_size=GRID_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (列, 行) -> [句柄]
+
+    def covered(self, x, y, r):
+        c = self.cell_size
+        for cx in range(int((x - r) // c), int((x + r) // c) + 1):
+            for cy in range(int((y - r) // c), int((y + r) // c) + 1):
+                yield cx, cy
+
+    def add(self, handle, x, y, r):
+        for key in self.covered(x, y, r):
+            self.cells.setdefault(key, []).append(handle)
+
+    def remove(self, handle, x, y, r):
+        for key in self.covered(x, y, r):
+            cell = self.cells[key]
+            cell.remove(handle)
+            if not cell:
+                del self.cells[key]
+
+    def at(self, x, y):
+        """覆盖点 (x, y) 所在格子的全部句柄。"""
+        c = self.cell_size
+        return self.cells.get((int(x // c), int(y // c)), ())
+
+    def in_box(self, x0, y0, x1, y1):
+        """与矩形 [x0, x1] x [y0, y1] 相交的格子中的全部句柄，不重复。"""
+        c = self.cell_size
+        cx0, cx1 = int(x0 // c), int(x1 // c)
+        cy0, cy1 = int(y0 // c), int(y1 // c)
+        found = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # 登记的格子比矩形覆盖的还少时直接逐个检查
+            for (cx, cy), cell in self.cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    found.update(cell)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    found.update(self.cells.get((cx, cy), ()))
+        return found
+
+    def clear(self):
+        self.cells.clear()
+
+    def fork(self):
+        child = SpatialHash.__new__(SpatialHash)
+        child.cell_size = self.cell_size
+        child.cells = {key: cell[:] for key, cell in self.cells.items()}
+        return child
+
+
+def due_tick(since, interval, tick_rate=TICK_RATE, strict=False):
+    """最早满足 t / tick_rate - since >= interval(strict 时为 >)的步数 t。
+
+    按与逐步比较时相同的浮点表达式逐个检验，换成事件调度后触发的步数不变。
+    """
+    tick = max(0, math.floor((since + interval) * tick_rate) - 1)
+    while True:
+        elapsed = tick / tick_rate - since
+        if elapsed > interval or (elapsed == interval and not strict):
+            return tick
+        tick += 1
+
+
+class Scheduler:
+    """按到期步数排列的事件堆，键为实体句柄，每个键至多一个待处理事件。
+
+    取消只把堆中的条目标记作废，是常数时间；实体被移除后句柄失效，
+    到期时由调用方按句柄查不到即丢弃，因此移除实体时也不必取消。
+    """
+
+    def __init__(self):
+        self.heap = []  # [到期步数, 序号, 键]，作废的条目键为 None
+        self.entries = {}
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def schedule(self, tick, key):
+        self.cancel(key)
+        entry = [tick, self.seq, key]
+        self.seq += 1
+        self.entries[key] = entry
+        heapq.heappush(self.heap, entry)
+
+    def cancel(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            entry[2] = None
+
+    def fork(self):
+        child = Scheduler.__new__(Scheduler)
+        # 取消时改写条目本身，条目不能与原堆共享
+        child.heap = [entry[:] for entry in self.heap]
+        child.entries = {entry[2]: entry for entry in child.heap if entry[2] is not None}
+        child.seq = self.seq
+        return child
+
+    def pop_due(self, tick):
+        """取出所有到期步数不晚于 tick 的键。"""
+        heap = self.heap
+        due = []
+        while heap and heap[0][0] <= tick:
+            key = heapq.heappop(heap)[2]
+            if key is not None:
+                del self.entries[key]
+                due.append(key)
+        return due
+
+
+class EntityPool:
+    """同类实体的空闲链表：回收的实例重新调用 __init__ 复用，减少分配与垃圾回收。"""
+
+    def __init__(self, cls, capacity=1024):
+        self.cls = cls
+        self.capacity = capacity
+        self.free = []
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.__init__(*args, **kwargs)
+            return obj
+        return self.cls(*args, **kwargs)
+
+    def release(self, obj):
+        # 调用方保证释放后不再持有该实例
+        if len(self.free) < self.capacity:
+            self.free.append(obj)
+
+
+class LawnMower:
+    def __init__(self, row, max_x=SCREEN_WIDTH):
+        self.row = row
+        self.max_x = max_x  # 世界右边界
+        self.x = GRID_OFFSET_X - 10
+        self.y = GRID_OFFSET_Y + row * GRID_SIZE + GRID_SIZE // 4
+        self.width = GRID_SIZE // 2
+        self.height = GRID_SIZE // 2
+        self.active = True      # 仍可驻守在起始位置
+        self.triggered = False  # 是否已启动
+        self.speed = LAWN_MOWER_SPEED
+
+    def update(self, lanes, steps=1, spawned=None):
+        """推进小推车 steps 个小步，返回碾碎的僵尸。spawned 同 Simulation.spawned。"""
+        if not self.active or not self.triggered:
+            return []
+        # 如果已触发则向右移动并碾碎本行僵尸
+        x0 = self.x
+        self.x += self.speed * steps
+        if steps == 1:
+            crushed = lanes.in_range(self.row, self.x, self.x + self.width + 20)
+        else:
+            crushed = self.sweep(lanes, x0, steps, spawned or {})
+        for z in crushed:
+            z.health = 0
+            z.active = False
+        # 移出世界右边界后失效
+        if self.x > self.max_x + 20:
+            self.active = False
+        return crushed
+
+    def sweep(self, lanes, x0, steps, spawned):
+        """粗步长下逐小步的碾压判定：第 i 小步小推车在 x0 + speed*i，
+        已走完本步的僵尸当时在 z.x + v*(steps-i)，落在 [小推车, 小推车 + width + 20] 内即被碾碎。
+        本步第 j 小步才出现的僵尸从第 j+1 小步起参与判定。"""
+        reach = self.width + 20
+        # 驶出右边界的那一小步仍会碾压，之后不再判定
+        last = min(steps, int((self.max_x + 20 - x0) // self.speed) + 1)
+        lo = x0 + self.speed - ZOMBIE_MAX_SPEED * (steps - 1)
+        crushed = []
+        for z in lanes.in_range(self.row, lo, x0 + self.speed * last + reach):
+            v = 0 if z.attacking else z.speed
+            gap = z.x + v * steps - x0  # 第 i 小步的间距为 gap - (speed + v) * i
+            i = max(1 + spawned.get(id(z), 0), math.ceil((gap - reach) / (self.speed + v)))
+            if i <= last and gap - (self.speed + v) * i >= 0:
+                crushed.append(z)
+        return crushed
+
+    def copy(self):
+        mower = LawnMower.__new__(LawnMower)
+        mower.__dict__.update(self.__dict__)
+        return mower
+
+    def try_trigger(self, lanes):
+        if self.triggered or not self.active:
+            return
+        # 当有僵尸到达行最左端附近时触发
+        z = lanes.leftmost(self.row)
+        if z is not None and z.x <= GRID_OFFSET_X + 15:
+            self.triggered = True
+
+
+# 植物类
+class Plant:
+    __slots__ = ('row', 'col', 'x', 'y', 'health', 'max_health', 'name', 'cost',
+                 'cooldown', 'last_attack', 'attack_interval', 'handle', 'index', 'owner')
+    base_health = 100  # 初始生命值；平衡性调整只改实例的 max_health
+
+    def __init__(self, row, col, current_time=0.0):
+        self.row = row
+        self.col = col
+        self.x = GRID_OFFSET_X + col * GRID_SIZE
+        self.y = GRID_OFFSET_Y + row * GRID_SIZE
+        self.health = self.max_health = self.base_health
+        self.cooldown = 0
+        self.last_attack = 0
+        self.attack_interval = 2  # 攻击间隔(秒)
+
+    def update(self, current_time):
+        pass
+
+
+# 向日葵类
+class Sunflower(Plant):
+    __slots__ = ('sun_generation_time', 'last_generation')
+    base_health = 80
+
+    def __init__(self, row, col, current_time=0.0):
+        super().__init__(row, col, current_time)
+        self.name = "向日葵"
+        self.cost = 50
+        self.sun_generation_time = 10  # 生成阳光的时间间隔(秒)
+        self.last_generation = current_time
+
+    def update(self, current_time, suns, new_sun=None):
+        """到时间则产出阳光并返回它。"""
+        if current_time - self.last_generation >= self.sun_generation_time:
+            self.last_generation = current_time
+            sun = (new_sun or Sun)(self.x + GRID_SIZE//4, self.y, is_falling=False,
+                                   current_time=current_time)
+            suns.append(sun)
+            return sun
+        return None
+
+    def next_tick(self, tick_rate=TICK_RATE):
+        return due_tick(self.last_generation, self.sun_generation_time, tick_rate)
+
+
+# 豌豆射手类
+class Peashooter(Plant):
+    __slots__ = ('attack_power',)
+    base_health = 100
+
+    def __init__(self, row, col, current_time=0.0):
+        super().__init__(row, col, current_time)
+        self.name = "豌豆射手"
+        self.cost = 100
+        self.attack_power = 20
+        self.attack_interval = 1.5  # 攻击间隔(秒)
+        self.last_attack = current_time
+
+    def update(self, current_time, bullets, lanes, new_bullet=None):
+        """冷却结束且本行有僵尸时发射子弹并返回它。"""
+        # 检查这一行是否有僵尸
+        if lanes.count(self.row) and current_time - self.last_attack >= self.attack_interval:
+            self.last_attack = current_time
+            bullet = (new_bullet or Bullet)(self.x + GRID_SIZE, self.y + GRID_SIZE//2,
+                                            self.row, self.attack_power)
+            bullets.append(bullet)
+            return bullet
+        return None
+
+    def next_tick(self, tick_rate=TICK_RATE):
+        return due_tick(self.last_attack, self.attack_interval, tick_rate)
+
+
+# 坚果墙类
+class WallNut(Plant):
+    __slots__ = ()
+    base_health = 400  # 较高的生命值
+
+    def __init__(self, row, col, current_time=0.0):
+        super().__init__(row, col, current_time)
+        self.name = "坚果墙"
+        self.cost = 50
+
+
+# 子弹类
+class Bullet:
+    __slots__ = ('x', 'y', 'row', 'damage', 'speed', 'active', 'handle', 'index', 'owner')
+
+    def __init__(self, x, y, row, damage):
+        self.x = x
+        self.y = y
+        self.row = row
+        self.damage = damage
+        self.speed = 10
+        self.active = True
+
+    def update(self, max_x=SCREEN_WIDTH, steps=1):
+        self.x += self.speed * steps
+        if self.x > max_x:
+            self.active = False
+
+
+# 阳光类
+class Sun:
+    __slots__ = ('x', 'y', 'is_falling', 'collected', 'fall_speed', 'target_y', 'radius',
+                 'creation_time', 'lifespan', 'handle', 'index', 'owner')
+
+    def __init__(self, x, y, is_falling=True, current_time=0.0, rng=random, fall_range=(150, 450)):
+        self.x = x
+        self.y = y
+        self.is_falling = is_falling
+        self.collected = False
+        self.fall_speed = SUN_FALL_SPEED
+        self.target_y = rng.randint(*fall_range) if is_falling else y
+        self.radius = 20
+        self.creation_time = current_time
+        self.lifespan = 10  # 10秒后消失
+
+    def update(self, steps=1):
+        if self.is_falling and self.y < self.target_y:
+            # 与逐步推进一样停在首次到达 target_y 的那一小步
+            steps = min(steps, math.ceil((self.target_y - self.y) / self.fall_speed))
+            self.y += self.fall_speed * steps
+
+    def is_moving(self):
+        return self.is_falling and self.y < self.target_y
+
+    def is_expired(self, current_time):
+        return current_time - self.creation_time > self.lifespan
+
+    def expiry_tick(self, tick_rate=TICK_RATE):
+        return due_tick(self.creation_time, self.lifespan, tick_rate, strict=True)
+
+
+# 僵尸类
+class Zombie:
+    __slots__ = ('row', 'x', 'y', 'speed', 'health', 'max_health', 'attack_power',
+                 'attacking', 'target', 'active', 'handle', 'index', 'owner')
+    base_health = 100
+
+    def __init__(self, row, rng=random, x=SCREEN_WIDTH - 50):
+        self.row = row
+        self.x = x
+        self.y = GRID_OFFSET_Y + row * GRID_SIZE
+        self.speed = rng.uniform(0.3, 0.7)  # 每步移动的像素
+        self.health = self.max_health = self.base_health
+        self.attack_power = 0.5  # 每步造成的伤害
+        self.attacking = False
+        self.target = None  # 目标植物的句柄
+        self.active = True
+
+    def update(self, grid, steps=1, walk=None):
+        """推进 steps 个小步；walk 为粗步长时先走的小步数(碰到植物为止)，缺省走满 steps。"""
+        if self.attacking and self.target is not None:
+            plant = grid.plants.get(self.target)
+            # 目标已被其他僵尸吃掉时句柄失效，本步停止攻击
+            if plant is not None:
+                plant = grid.own(plant)
+                plant.health -= self.attack_power * steps
+            if plant is None or plant.health <= 0:
+                if plant is not None:
+                    grid.remove(plant)
+                self.attacking = False
+                self.target = None
+        else:
+            walked = steps if walk is None else min(walk, steps)
+            self.x -= self.speed * walked
+
+            # 检查是否有植物在同一行且在接触范围内
+            plant = grid.blocking_plant(self.row, self.x)
+            if plant is not None:
+                self.attacking = True
+                self.target = plant.handle
+                if walked < steps:
+                    # 粗步长时停在首次碰到植物的那一小步，余下的小步用来啃食
+                    return self.update(grid, steps - walked)
+
+        # 检查是否已到达最左侧
+        if self.x <= GRID_OFFSET_X:
+            return True  # 游戏结束标志
+
+        # 检查是否死亡
+        if self.health <= 0:
+            self.active = False
+
+        return False
+
+
+class FastZombie(Zombie):
+    __slots__ = ()
+    base_health = 80
+
+    def __init__(self, row, rng=random, x=SCREEN_WIDTH - 50):
+        super().__init__(row, rng, x)
+        self.speed = rng.uniform(0.8, 1.2)
+        self.attack_power = 0.4
+
+
+class TankZombie(Zombie):
+    __slots__ = ()
+    base_health = 200
+
+    def __init__(self, row, rng=random, x=SCREEN_WIDTH - 50):
+        super().__init__(row, rng, x)
+        self.speed = rng.uniform(0.2, 0.4)
+        self.attack_power = 0.8
+
+
+# 各类僵尸每步移动距离的上限(FastZombie)，粗步长扫掠时据此划定候选范围
+ZOMBIE_MAX_SPEED = 1.2
+
+
+# 可种植的植物
+PLANT_TYPES = {
+    "sunflower": {"name": "向日葵", "cost": 50, "class": Sunflower},
+    "peashooter": {"name": "豌豆射手", "cost": 100, "class": Peashooter},
+    "wallnut": {"name": "坚果墙", "cost": 50, "class": WallNut}
+}
+
+
+class Simulation:
+    """一局游戏的全部状态与规则，可在没有显示设备的环境中逐帧推进。
+
+    所有计时都读取注入的 SimClock，所有随机数都来自以 seed 初始化的 rng，
+    因此相同的种子与操作序列总会得到相同的对局。
+    """
+
+    # 分叉时原样带给子局的标量与配置；容器、时钟与随机数另行复制
+    FORK_FIELDS = (
+        'board', 'seed', 'sun_count', 'sun_collected', 'sun_spent', 'game_over', 'game_win',
+        'wave_count', 'max_waves', 'last_sun_generation', 'last_zombie_generation',
+        'zombie_interval', 'plant_types', 'level', 'step_ticks', 'step_first_tick', 'auto_collect',
+    )
+
+    def __init__(self, seed=None, clock=None, rows=GRID_ROWS, cols=GRID_COLS):
+        self.board = Board(rows, cols)
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.clock = clock or SimClock()
+        self.sun_count = 100
+        self.sun_collected = 0  # 累计收集的阳光
+        self.sun_spent = 0  # 累计花费的阳光
+        self.health_overrides = {}  # 类名 -> 生命值，用于平衡性调整
+        # 子弹与阳光频繁创建销毁，移除后回收到空闲链表
+        self.bullet_pool = EntityPool(Bullet)
+        self.sun_pool = EntityPool(Sun)
+        self.clear_entities()
+        self.game_over = False
+        self.game_win = False
+        self.wave_count = 0
+        self.max_waves = 5
+        self.last_sun_generation = self.clock.now
+        self.last_zombie_generation = self.clock.now
+        self.zombie_interval = ZOMBIE_GENERATION_TIME
+        self.plant_types = PLANT_TYPES
+        # 初始化每一行的小推车
+        self.lawn_mowers = [LawnMower(row, self.board.width) for row in range(rows)]
+        self.level = None  # 'easy' | 'normal' | 'hard'
+        # 每次 update 推进的步数；无界面长时间模拟可用粗步长换取速度，
+        # 移动与伤害按步数放大，子弹与小推车按小步扫掠判定，不会穿过僵尸
+        self.step_ticks = 1
+        self.step_first_tick = 0  # 当前这一步覆盖的第一个小步
+        # 本步中途出现的实体: id(实体) -> 出现的小步(从 0 起)，只推进余下的小步
+        self.spawned = {}
+        # 本步中途被子弹打死的僵尸: id(僵尸) -> 死亡的小步(从 1 起)，之后不再行动
+        self.killed = {}
+        # 本步行走中的僵尸首次被植物挡住的小步: id(僵尸) -> contact_step 的结果
+        self.contacts = {}
+        # 分叉后与另一局共享的僵尸、子弹与下落中的阳光尚未复制
+        self.shared_movers = False
+        # 每步推进阳光后自动收集场上全部阳光，供无界面批量对局使用
+        self.auto_collect = False
+
+    def start_level(self, level):
+        """按关卡配置参数。"""
+        self.level = level
+        preset = LEVEL_PRESETS[level]
+        self.max_waves = preset['max_waves']
+        self.zombie_interval = preset['zombie_interval']
+
+    def is_occupied(self, row, col):
+        # 检查该位置是否已有植物
+        return self.grid.get(row, col) is not None
+
+    def place_plant(self, kind, row, col):
+        """在指定格子种植物，成功时扣除阳光并返回新植物。"""
+        if not self.board.contains(row, col) or self.is_occupied(row, col):
+            return None
+        plant_info = self.plant_types[kind]
+        if self.sun_count < plant_info["cost"]:
+            return None
+        self.sun_count -= plant_info["cost"]
+        self.sun_spent += plant_info["cost"]
+        plant = plant_info["class"](row, col, self.clock.now)
+        self.apply_health_override(plant)
+        self.add_plant(plant)
+        return plant
+
+    def add_plant(self, plant):
+        self.grid.add(plant)
+        self.schedule_plant(plant)
+
+    def schedule_plant(self, plant):
+        """按植物的冷却时间登记下一次行动；改动其计时字段后需重新调用。"""
+        if isinstance(plant, (Sunflower, Peashooter)):
+            self.plant_timers.schedule(plant.next_tick(self.clock.tick_rate), plant.handle)
+
+    def add_sun(self, sun):
+        self.suns.append(sun)
+        self.track_sun(sun)
+
+    def track_sun(self, sun):
+        """登记已加入的阳光：安排消失时刻，下落中的逐步推进，落定的放进空间哈希。"""
+        self.sun_timers.schedule(sun.expiry_tick(self.clock.tick_rate), sun.handle)
+        if sun.is_moving():
+            self.falling_suns.append(sun)
+        else:
+            self.sun_hash.add(sun.handle, sun.x, sun.y, sun.radius)
+
+    def remove_sun(self, sun):
+        self.suns.remove(sun)
+        self.sun_timers.cancel(sun.handle)
+        if sun.is_moving():
+            # 下落中的同时只有寥寥几个；按句柄比较，列表中的可能是换入副本前的原件
+            handle = sun.handle
+            self.falling_suns = [s for s in self.falling_suns if s.handle != handle]
+        else:
+            self.sun_hash.remove(sun.handle, sun.x, sun.y, sun.radius)
+        # 与分叉出的对局共享的阳光仍在对方场上，不能回收复用
+        if self.suns.owns(sun):
+            self.sun_pool.release(sun)
+
+    def apply_health_override(self, entity):
+        hp = self.health_overrides.get(type(entity).__name__)
+        if hp is not None:
+            entity.health = entity.max_health = hp
+
+    def clear_entities(self):
+        """清空场上的植物、僵尸、子弹和阳光；读档时据此重建容器。"""
+        self.grid = PlantGrid(self.board.rows, self.board.cols)
+        self.plants = self.grid.plants
+        self.zombies = EntityStore()
+        self.lanes = LaneIndex(self.board.rows)
+        self.bullets = RowStore(self.board.rows)
+        self.suns = EntityStore()
+        # 阳光分为下落中的(列表，每步推进)与落定的(空间哈希中的句柄，只供点击查询，不再逐步处理)
+        self.falling_suns = []
+        self.sun_hash = SpatialHash()
+        # 植物冷却与阳光消失由事件堆驱动，每步只处理到期的实体
+        self.plant_timers = Scheduler()
+        self.sun_timers = Scheduler()
+        # 冷却已结束、等本行出现僵尸才发射的豌豆射手: 行 -> {植物句柄}
+        self.waiting_shooters = [set() for _ in range(self.board.rows)]
+
+    def add_zombie(self, zombie):
+        self.apply_health_override(zombie)
+        self.insert_zombie(zombie)
+
+    def insert_zombie(self, zombie):
+        """按原样加入僵尸，不套用生命值调整。"""
+        self.zombies.append(zombie)
+        self.lanes.add(zombie)
+
+    def remove_zombie(self, zombie):
+        self.zombies.remove(zombie)
+        self.lanes.remove(zombie)
+
+    def fork(self, seed=None):
+        """分叉出一局无界面的 Simulation，供前瞻搜索推演；界面状态不带过去。
+
+        只复制容器与计数器，植物、僵尸、子弹和阳光由两局共享，任一方改写前才复制。
+        seed 为 None 时子局延续同一随机数序列，施加同样的操作会与原局得到同样的结果；
+        给出 seed 则改用以它初始化的随机数，推演不同的未来。
+        """
+        child = Simulation.__new__(Simulation)
+        for name in self.FORK_FIELDS:
+            setattr(child, name, getattr(self, name))
+        if seed is None:
+            child.rng = fork_rng(self.rng)
+        else:
+            child.seed = seed
+            child.rng = random.Random(seed)
+        child.clock = copy.copy(self.clock)
+        child.health_overrides = dict(self.health_overrides)
+        child.bullet_pool = EntityPool(Bullet)
+        child.sun_pool = EntityPool(Sun)
+        child.grid = self.grid.fork()
+        child.plants = child.grid.plants
+        child.zombies = self.zombies.fork()
+        child.lanes = self.lanes.fork()
+        child.bullets = self.bullets.fork()
+        child.suns = self.suns.fork()
+        child.falling_suns = self.falling_suns[:]
+        child.sun_hash = self.sun_hash.fork()
+        child.plant_timers = self.plant_timers.fork()
+        child.sun_timers = self.sun_timers.fork()
+        child.waiting_shooters = [set(waiting) for waiting in self.waiting_shooters]
+        child.lawn_mowers = [mower.copy() for mower in self.lawn_mowers]
+        self.shared_movers = child.shared_movers = True
+        return child
+
+    def own_movers(self):
+        """分叉后的第一步：每步都要改写的僵尸、子弹和下落中的阳光一次换成本局的副本。"""
+        self.shared_movers = False
+        zombies = self.zombies
+        for lane in self.lanes.lanes:
+            lane[:] = [zombies.own(z) for z in lane]
+        for bullet in self.bullets:
+            self.bullets.own(bullet)
+        self.falling_suns = [self.suns.own(sun) for sun in self.falling_suns]
+
+    def collect_suns(self, x, y):
+        """收集点 (x, y) 处的全部阳光：落定的只查空间哈希中的一个格子，另加下落中的。"""
+        suns = self.suns
+        candidates = [suns.get(handle) for handle in self.sun_hash.at(x, y)]
+        candidates.extend(self.falling_suns)
+        hits = [sun for sun in candidates
+                if not sun.collected and ((x - sun.x)**2 + (y - sun.y)**2) <= sun.radius**2]
+        # 按出现顺序收集，与逐个检查全部阳光时一致
+        hits.sort(key=lambda sun: sun.index)
+        for sun in hits:
+            sun = suns.own(sun)
+            sun.collected = True
+            self.sun_count += SUN_VALUE
+            self.sun_collected += SUN_VALUE
+            self.remove_sun(sun)
+
+    def collect_all_suns(self):
+        """一次收集场上全部阳光，返回收集的个数。"""
+        suns = self.suns
+        n = len(suns)
+        if not n:
+            return 0
+        for sun in suns:
+            suns.remove(sun)
+            self.sun_timers.cancel(sun.handle)
+            if suns.owns(sun):
+                self.sun_pool.release(sun)
+        self.falling_suns = []
+        self.sun_hash.clear()
+        self.sun_count += n * SUN_VALUE
+        self.sun_collected += n * SUN_VALUE
+        return n
+
+    def mark_spawned(self, entity, current_time):
+        """粗步长下记下在本步第几小步出现，移动与扫掠只计其后的小步。"""
+        if self.step_ticks > 1:
+            self.spawned[id(entity)] = round(current_time * self.clock.tick_rate) - self.step_first_tick
+
+    def fire_time(self, since, interval, current_time):
+        """计时器在本步内到期的时刻：粗步长时取到期的那一小步，间隔不随步长漂移。"""
+        if self.step_ticks == 1:
+            return current_time
+        rate = self.clock.tick_rate
+        return max(due_tick(since, interval, rate), self.step_first_tick) / rate
+
+    def generate_sun(self, current_time):
+        if current_time - self.last_sun_generation >= SUN_GENERATION_TIME:
+            current_time = self.fire_time(self.last_sun_generation, SUN_GENERATION_TIME, current_time)
+            self.last_sun_generation = current_time
+            sun = self.sun_pool.acquire(self.rng.randint(100, self.board.width - 100), -20,
+                                        current_time=current_time, rng=self.rng,
+                                        fall_range=self.board.sun_fall_range)
+            self.mark_spawned(sun, current_time)
+            self.add_sun(sun)
+
+    def generate_zombie(self, current_time):
+        # 随着波数增加，生成僵尸的频率增加
+        if current_time - self.last_zombie_generation >= self.zombie_interval:
+            self.last_zombie_generation = self.fire_time(self.last_zombie_generation,
+                                                         self.zombie_interval, current_time)
+
+            # 计算当前应该生成多少僵尸
+            base = 1 if self.level == 'easy' else (2 if self.level == 'normal' else 3)
+            zombies_to_spawn = min(base + self.wave_count//2, 4)
+
+            spawn_x = self.board.spawn_x
+            for _ in range(zombies_to_spawn):
+                row = self.rng.randint(0, self.board.rows - 1)
+                # 按关卡与波次选择僵尸类型
+                r = self.rng.random()
+                if self.level == 'easy':
+                    z = Zombie(row, self.rng, spawn_x) if r < 0.7 else FastZombie(row, self.rng, spawn_x)
+                elif self.level == 'normal':
+                    z = FastZombie(row, self.rng, spawn_x) if r < 0.5 else Zombie(row, self.rng, spawn_x)
+                else:
+                    # 困难包含重装僵尸
+                    if r < 0.4:
+                        z = FastZombie(row, self.rng, spawn_x)
+                    elif r < 0.8:
+                        z = Zombie(row, self.rng, spawn_x)
+                    else:
+                        z = TankZombie(row, self.rng, spawn_x)
+                self.mark_spawned(z, self.last_zombie_generation)
+                self.add_zombie(z)
+
+            self.wave_count += 1
+
+            # 减少生成间隔，增加难度
+            self.zombie_interval = max(3, ZOMBIE_GENERATION_TIME - self.wave_count)
+
+            # 检查是否达到最大波数
+            if self.wave_count >= self.max_waves and len(self.zombies) == 0:
+                self.game_win = True
+
+    def update(self):
+        """推进 step_ticks 个固定步长。"""
+        if self.game_over or self.game_win:
+            return
+        self.begin_step()
+
+        # 更新子弹
+        self.update_bullets()
+
+        # 更新僵尸
+        self.update_zombies()
+
+        # 更新并触发小推车
+        self.update_mowers()
+
+        self.end_step()
+
+    def begin_step(self):
+        """一步中移动实体之前的部分：推进时钟，生成并更新阳光、僵尸与植物。
+
+        多局共用列式存储时，各局先逐局执行这一部分，再一起推进子弹、僵尸与小推车。
+        """
+        if self.shared_movers:
+            self.own_movers()
+        self.step_first_tick = self.clock.ticks
+        self.spawned = {}
+        self.killed = {}
+        self.contacts = {}
+        self.clock.advance(self.step_ticks)
+        # 本步最后一个小步的时刻；单步推进时即推进前的时刻
+        current_time = (self.clock.ticks - 1) / self.clock.tick_rate
+        # 生成阳光
+        self.generate_sun(current_time)
+
+        # 更新阳光
+        self.update_suns(current_time)
+
+        # 生成僵尸
+        if self.wave_count < self.max_waves or len(self.zombies) > 0:
+            self.generate_zombie(current_time)
+
+        # 更新植物
+        self.update_plants(current_time)
+
+    def end_step(self):
+        """一步的收尾：压缩空位并检查胜利条件。"""
+        # 压缩本步删除留下的空位
+        self.compact()
+
+        # 检查胜利条件
+        if self.wave_count >= self.max_waves and len(self.zombies) == 0:
+            self.game_win = True
+
+    def compact(self):
+        self.grid.compact()
+        for store in (self.zombies, self.bullets, self.suns):
+            store.compact()
+
+    def update_suns(self, current_time):
+        steps = self.step_ticks
+        spawned = self.spawned
+        falling = []
+        # 只有下落中的阳光会移动；落地后移入空间哈希
+        for sun in self.falling_suns:
+            sun.update(steps - spawned.get(id(sun), 0))
+            if sun.is_moving():
+                falling.append(sun)
+            else:
+                self.sun_hash.add(sun.handle, sun.x, sun.y, sun.radius)
+        self.falling_suns = falling
+        # 本步到期的阳光；已被收集的在收集时就取消了
+        for handle in self.sun_timers.pop_due(self.clock.ticks - 1):
+            sun = self.suns.get(handle)
+            if sun is not None:
+                self.remove_sun(sun)
+        if self.auto_collect:
+            self.collect_all_suns()
+
+    def update_plants(self, current_time):
+        tick = self.clock.ticks - 1  # current_time 对应的步数
+        plants = self.plants
+        ready = [p for p in map(plants.get, self.plant_timers.pop_due(tick)) if p is not None]
+        for row, waiting in enumerate(self.waiting_shooters):
+            if waiting and self.lanes.count(row):
+                ready.extend(p for p in map(plants.get, waiting) if p is not None)
+                waiting.clear()
+        # 行动会改写植物的计时
+        ready = [self.grid.own(p) for p in ready]
+        # 与逐株轮询时一样按种植顺序行动，保证子弹与阳光的先后不变；
+        # 粗步长时各株在各自到期的小步行动，先按小步排序
+        if self.step_ticks == 1:
+            ready.sort(key=lambda p: p.index)
+            timed = [(current_time, p) for p in ready]
+        else:
+            rate = self.clock.tick_rate
+            first = self.step_first_tick
+            # 豌豆射手要等本行出现僵尸的那一小步才会发射
+            appear = {}
+            for p in ready:
+                if isinstance(p, Peashooter) and p.row not in appear:
+                    appear[p.row] = first + min((self.spawned.get(id(z), 0)
+                                                 for z in self.lanes.lanes[p.row]), default=0)
+            timed = sorted(((max(p.next_tick(rate), appear.get(p.row, first)
+                                 if isinstance(p, Peashooter) else first), p.index, p)
+                            for p in ready), key=lambda t: t[:2])
+            timed = [(t / rate, p) for t, _, p in timed]
+        for current_time, plant in timed:
+            if isinstance(plant, Sunflower):
+                sun = plant.update(current_time, self.suns, self.sun_pool.acquire)
+                if sun is not None:
+                    self.track_sun(sun)
+                self.schedule_plant(plant)
+            else:
+                bullet = plant.update(current_time, self.bullets, self.lanes, self.bullet_pool.acquire)
+                if bullet is not None:
+                    self.mark_spawned(bullet, current_time)
+                if bullet is not None or self.lanes.count(plant.row):
+                    self.schedule_plant(plant)
+                else:
+                    self.waiting_shooters[plant.row].add(plant.handle)
+
+    def update_bullets(self):
+        if self.step_ticks > 1:
+            self.sweep_bullets(self.step_ticks)
+            return
+        for bullet in self.bullets:
+            bullet.update(self.board.width)
+            if not bullet.active:
+                self.bullets.remove(bullet)
+                self.bullet_pool.release(bullet)
+            else:
+                # 检查子弹是否击中僵尸(zombie.x - 30 <= bullet.x <= zombie.x + 10)，
+                # 只需查看本行离子弹最近的僵尸
+                zombie = self.lanes.first_in_range(bullet.row, bullet.x - 10, bullet.x + 30)
+                if zombie is not None:
+                    zombie.health -= bullet.damage
+                    self.bullets.remove(bullet)
+                    self.bullet_pool.release(bullet)
+
+    def sweep_bullets(self, steps):
+        """粗步长下的子弹命中：把一步拆成 steps 个小步，按小步先后结算。
+
+        第 i 小步子弹在 x0 + speed*i，僵尸仍在上一小步的位置(见 zombie_path)，
+        命中窗口与逐步推进时相同；两者间距随 i 单调减小，命中的小步用二分查找。
+        同一小步内按子弹顺序结算、取最靠左的僵尸；在更早小步被打死的僵尸已被移除，
+        不再挡住之后的子弹。本步第 j 小步才出现的子弹从第 j+1 小步起移动与判定。
+        """
+        width = self.board.width
+        spawned = self.spawned
+        paths = {}  # id(僵尸) -> zombie_path
+        candidates = []  # 每颗子弹按 (小步, 僵尸位置) 排好的候选 [(i, x, 僵尸)]
+        queue = []  # (小步, 子弹序号, 候选下标)
+        for order, bullet in enumerate(self.bullets):
+            x0, speed = bullet.x, bullet.speed
+            jb = spawned.get(id(bullet), 0)
+            # 飞出右边界的那一小步起子弹已被移除
+            last = min(steps, jb + int((width - x0) // speed))
+            bullet.update(width, steps - jb)
+            cands = []
+            if last > jb:
+                hi = x0 + speed * (last - jb) + ZOMBIE_MAX_SPEED * (last - 1) + 30
+                for z in self.lanes.in_range(bullet.row, x0 + speed - 10, hi):
+                    path = paths.get(id(z))
+                    if path is None:
+                        path = paths[id(z)] = self.zombie_path(z, steps)
+                    # 间距 zombie.x - bullet.x 随小步单调减小，二分找首个不超过 30 的小步
+                    lo, hi_step = 1 + jb, last + 1
+                    while lo < hi_step:
+                        mid = (lo + hi_step) // 2
+                        if path[mid] - (x0 + speed * (mid - jb)) <= 30:
+                            hi_step = mid
+                        else:
+                            lo = mid + 1
+                    if lo <= last and path[lo] - (x0 + speed * (lo - jb)) >= -10:
+                        cands.append((lo, path[lo], z))
+            cands.sort(key=lambda c: c[:2])
+            candidates.append((bullet, cands))
+            if cands:
+                queue.append((cands[0][0], order, 0))
+        heapq.heapify(queue)
+        died = self.killed
+        hit = set()
+        while queue:
+            i, order, k = heapq.heappop(queue)
+            bullet, cands = candidates[order]
+            zombie = cands[k][2]
+            dead_at = died.get(id(zombie), 0 if zombie.health <= 0 else None)
+            if dead_at is not None and dead_at < i:
+                if k + 1 < len(cands):
+                    heapq.heappush(queue, (cands[k + 1][0], order, k + 1))
+                continue
+            zombie.health -= bullet.damage
+            if zombie.health <= 0 and dead_at is None:
+                died[id(zombie)] = i
+            hit.add(order)
+        for order, (bullet, _) in enumerate(candidates):
+            if order in hit or not bullet.active:
+                self.bullets.remove(bullet)
+                self.bullet_pool.release(bullet)
+
+    def zombie_path(self, zombie, steps):
+        """粗步长下僵尸在第 i 小步(从 1 起)子弹判定时的位置，即走完前 i-1 小步后的 x。
+
+        本步第 j 小步才出现的僵尸在此之前记为无穷远；本步内会碰到植物的僵尸走到接触处即停下。
+        下标 0 不用。
+        """
+        jz = self.spawned.get(id(zombie), 0)
+        if zombie.attacking:
+            v, stop = 0, 0
+        else:
+            v = zombie.speed
+            stop = self.contact_step(zombie, steps) or steps
+        return [math.inf] * (1 + jz) + [zombie.x - v * min(k, stop) for k in range(steps - jz)]
+
+    def update_zombies(self):
+        steps = self.step_ticks
+        spawned, killed = self.spawned, self.killed
+        # 本步有植物会被吃掉的行逐小步推进：植物倒下后同行僵尸要从那一小步起重新行走
+        fine_rows = self.rows_losing_plants(steps) if steps > 1 else ()
+        for zombie in self.zombies:
+            if zombie.row in fine_rows:
+                continue
+            # 逐步推进时僵尸在被打死的那一小步仍会行动
+            acted = killed.get(id(zombie), steps) - spawned.get(id(zombie), 0)
+            walk = None if steps == 1 or zombie.attacking else self.contact_step(zombie, steps)
+            if self.step_zombie(zombie, acted, walk):
+                break
+        else:
+            if fine_rows:
+                self.substep_zombies([z for z in self.zombies if z.row in fine_rows], steps)
+        self.lanes.reindex()
+
+    def substep_zombies(self, group, steps):
+        """逐小步推进 group 中的僵尸，每个只在出现之后、被打死之前行动。"""
+        spawned, killed = self.spawned, self.killed
+        for tick in range(1, steps + 1):
+            for zombie in group:
+                if (zombie.active and spawned.get(id(zombie), 0) < tick <= killed.get(id(zombie), steps)
+                        and self.step_zombie(zombie, 1)):
+                    return
+
+    def step_zombie(self, zombie, steps, walk=None):
+        """推进一个僵尸 steps 个小步，返回是否游戏结束。"""
+        game_over = zombie.update(self.grid, steps, walk)
+        if game_over:
+            # 该僵尸已到达最左端，若本行小推车仍在则立即启动
+            mower = self.lawn_mowers[zombie.row]
+            if mower.active:
+                mower.triggered = True
+            else:
+                # 该行小推车已用完，游戏结束
+                self.game_over = True
+                return True
+        if not zombie.active:
+            self.remove_zombie(zombie)
+        return False
+
+    def contact_step(self, zombie, steps):
+        """行走中的僵尸本步在第几小步(从其出现起算)首次被挡住；植物在僵尸更新前不变，每步只算一次。"""
+        key = id(zombie)
+        if key not in self.contacts:
+            self.contacts[key] = self.grid.contact_step(
+                zombie.row, zombie.x, zombie.speed, steps - self.spawned.get(key, 0))
+        return self.contacts[key]
+
+    def rows_losing_plants(self, steps):
+        """本步内可能有植物被吃掉的行：按每个僵尸整步都在啃食估计伤害上限。"""
+        grid = self.grid
+        damage = {}  # 植物句柄 -> (行, 伤害上限)
+        rows = set()
+        for zombie in self.zombies:
+            if zombie.attacking:
+                handle = zombie.target
+            else:
+                k = self.contact_step(zombie, steps)
+                if k is None:
+                    continue
+                handle = grid.blocking_plant(zombie.row, zombie.x - zombie.speed * k).handle
+            if handle is None:
+                rows.add(zombie.row)
+                continue
+            _, dealt = damage.get(handle, (zombie.row, 0))
+            damage[handle] = (zombie.row, dealt + zombie.attack_power * steps)
+        for handle, (row, dealt) in damage.items():
+            plant = grid.plants.get(handle)
+            if plant is None or plant.health <= dealt:
+                rows.add(row)
+        return rows
+
+    def update_mowers(self):
+        for mower in self.lawn_mowers:
+            mower.try_trigger(self.lanes)
+            for z in mower.update(self.lanes, self.step_ticks, self.spawned):
+                self.remove_zombie(z)
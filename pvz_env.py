@@ -0,0 +1,293 @@
+"""批量对局环境：以 reset/step 接口同时推进 N 局互相独立的无界面对局，供自动玩家训练与评估。
+
+动作是整数：0 不操作，1 收集场上全部阳光，其余表示“在 (行, 列) 种某种植物”，
+由 place_action/decode_action 编码与解码；种不下(已占用或阳光不足)的动作被忽略。
+每次 step 先对每局施加动作，再推进 frame_skip 步模拟。观测按局堆叠成 NumPy 数组：
+
+    plants         (N, 行, 列)  各格植物种类编号，0 表示空格，编号为 KINDS 中的下标加一
+    zombie_health  (N, 行)      各行僵尸生命值之和
+    sun_count      (N,)         当前阳光
+    wave_count     (N,)         已出的波数
+
+胜利奖励 1、失败 -1，其余为 0。结束(胜、负或超过 max_ticks)的对局随即以新种子重开，
+对应的 done 为 True，info 为结束时的统计。第 i 局的第 k 个种子是 seed + i + k * N，
+因此同样的参数和动作序列总得到同样的结果，与是否使用子进程无关。
+
+backend="soa" 时 BatchEnv 把 N 局的僵尸与子弹放进同一个 pvz_soa.ArrayBatch，每一步
+对全部对局一次向量化推进；object 后端则逐局推进。要用多个进程推进请用
+SubprocBatchEnv(make_env 的 workers 参数)，两者可以叠加。
+
+需要安装 numpy。
+
+示例:
+    python pvz_env.py --games 64 --steps 2000               # 单进程，随机动作测吞吐
+    python pvz_env.py --games 256 --steps 2000 --workers 8  # 分到 8 个子进程
+"""
+import argparse
+import time
+from multiprocessing import Pipe, Process
+
+import numpy as np
+
+from pvz_core import PLANT_TYPES
+from pvz_sweep import DECISION_INTERVAL, DEFAULT_MAX_TICKS, game_stats, make_simulation
+
+NOOP = 0
+COLLECT = 1
+PLACE_BASE = 2  # 种植动作的起始编号
+KINDS = tuple(PLANT_TYPES)
+KIND_CODES = {info["class"]: i + 1 for i, info in enumerate(PLANT_TYPES.values())}
+OBS_FIELDS = ("plants", "zombie_health", "sun_count", "wave_count")
+
+
+def num_actions(rows, cols):
+    return PLACE_BASE + len(KINDS) * rows * cols
+
+
+def place_action(kind, row, col, rows, cols):
+    return PLACE_BASE + (KINDS.index(kind) * rows + row) * cols + col
+
+
+def decode_action(action, rows, cols):
+    """返回 (种类, 行, 列)；不操作与收集阳光返回 None。"""
+    if action < PLACE_BASE:
+        return None
+    kind, cell = divmod(action - PLACE_BASE, rows * cols)
+    return (KINDS[kind],) + divmod(cell, cols)
+
+
+class BatchEnv:
+    """在本进程内推进的 N 局对局；backend、step_ticks、auto_collect、params 的含义同 pvz_sweep。
+
+    backend="soa" 时各局共用一个 ArrayBatch，step 施加完全部动作后一起推进；
+    否则对各局依次施加动作并推进。
+    """
+
+    def __init__(self, n, level="normal", seed=0, frame_skip=DECISION_INTERVAL,
+                 max_ticks=DEFAULT_MAX_TICKS, backend="object", step_ticks=1, auto_collect=False,
+                 params=None, offset=0, stride=None):
+        self.n = n
+        self.config = {"level": level, "backend": backend, "step_ticks": step_ticks,
+                       "auto_collect": auto_collect, "params": params or {}}
+        self.seed = seed
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+        # 子进程只负责一部分对局，offset 与 stride 使种子序列与单进程时相同
+        self.offset = offset
+        self.stride = stride or n
+        self.episodes = [0] * n
+        self.batch = None
+        if backend == "soa":
+            from pvz_soa import ArrayBatch
+            self.batch = ArrayBatch(n)
+        self.sims = [self.new_game(i) for i in range(n)]
+        rows, cols = self.sims[0].board.rows, self.sims[0].board.cols
+        self.rows, self.cols = rows, cols
+        self.obs = {
+            "plants": np.zeros((n, rows, cols), np.int8),
+            "zombie_health": np.zeros((n, rows), np.float32),
+            "sun_count": np.zeros(n, np.int64),
+            "wave_count": np.zeros(n, np.int64),
+        }
+
+    @property
+    def num_actions(self):
+        return num_actions(self.rows, self.cols)
+
+    def new_game(self, i, seed=None):
+        if seed is None:
+            seed = self.seed + self.offset + i + self.episodes[i] * self.stride
+        self.episodes[i] += 1
+        return make_simulation(self.config, seed, self.batch, i)
+
+    def reset(self, seeds=None):
+        """重开全部对局；seeds 为 None 时从头使用默认的种子序列。"""
+        self.episodes = [0] * self.n
+        self.sims = [self.new_game(i, None if seeds is None else int(seeds[i]))
+                     for i in range(self.n)]
+        for i, sim in enumerate(self.sims):
+            self.observe(i, sim)
+        if self.batch is not None:
+            self.observe_zombies()
+        return self.observation()
+
+    def step(self, actions):
+        """返回 (观测, 奖励, done, info 列表)。"""
+        rewards = np.zeros(self.n, np.float32)
+        dones = np.zeros(self.n, np.bool_)
+        infos = [None] * self.n
+        if self.batch is not None:
+            for i, sim in enumerate(self.sims):
+                self.apply(sim, int(actions[i]))
+            # 已结束的对局由 ArrayBatch.update 跳过
+            for _ in range(self.frame_skip):
+                self.batch.update()
+        for i, sim in enumerate(self.sims):
+            if self.batch is None:
+                self.apply(sim, int(actions[i]))
+                ticks = 0
+                while ticks < self.frame_skip and not (sim.game_over or sim.game_win):
+                    sim.update()
+                    ticks += sim.step_ticks
+            if sim.game_over or sim.game_win or sim.clock.ticks >= self.max_ticks:
+                rewards[i] = 1 if sim.game_win else -1 if sim.game_over else 0
+                dones[i] = True
+                infos[i] = {"seed": sim.seed, **game_stats(sim)}
+                self.sims[i] = sim = self.new_game(i)
+            self.observe(i, sim)
+        if self.batch is not None:
+            self.observe_zombies()
+        return self.observation(), rewards, dones, infos
+
+    def apply(self, sim, action):
+        if action == COLLECT:
+            sim.collect_all_suns()
+        elif action != NOOP:
+            sim.place_plant(*decode_action(action, self.rows, self.cols))
+
+    def observe(self, i, sim):
+        plants = self.obs["plants"][i]
+        plants.fill(0)
+        for plant in sim.plants:
+            plants[plant.row, plant.col] = KIND_CODES[type(plant)]
+        if self.batch is None:
+            health = [0.0] * self.rows
+            for zombie in sim.zombies:
+                health[zombie.row] += zombie.health
+            self.obs["zombie_health"][i] = health
+        self.obs["sun_count"][i] = sim.sun_count
+        self.obs["wave_count"][i] = sim.wave_count
+
+    def observe_zombies(self):
+        """soa 后端：一次按 (局, 行) 求出全部对局各行的僵尸生命值之和。"""
+        zombies = self.batch.zombies
+        self.obs["zombie_health"][:] = np.bincount(
+            self.batch.lanes(zombies), weights=zombies.col("health"),
+            minlength=self.n * self.rows).reshape(self.n, self.rows)
+
+    def observation(self):
+        return {name: array.copy() for name, array in self.obs.items()}
+
+    def close(self):
+        pass
+
+
+def worker(conn, n, kwargs):
+    env = BatchEnv(n, **kwargs)
+    while True:
+        command, data = conn.recv()
+        if command == "reset":
+            conn.send(env.reset(data))
+        elif command == "step":
+            conn.send(env.step(data))
+        elif command == "spec":
+            conn.send((env.rows, env.cols))
+        elif command == "close":
+            break
+    conn.close()
+
+
+class SubprocBatchEnv:
+    """把 N 局分到 workers 个子进程中推进，接口与 BatchEnv 相同。"""
+
+    def __init__(self, n, workers, seed=0, **kwargs):
+        workers = max(1, min(workers, n))
+        self.n = n
+        bounds = [n * k // workers for k in range(workers + 1)]
+        self.slices = [slice(lo, hi) for lo, hi in zip(bounds, bounds[1:])]
+        self.conns = []
+        self.procs = []
+        for part in self.slices:
+            conn, child = Pipe()
+            args = dict(kwargs, seed=seed, offset=part.start, stride=n)
+            proc = Process(target=worker, args=(child, part.stop - part.start, args), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(conn)
+            self.procs.append(proc)
+        # 草坪尺寸由对局决定，各子进程相同，问第一个即可
+        self.conns[0].send(("spec", None))
+        self.rows, self.cols = self.conns[0].recv()
+
+    @property
+    def num_actions(self):
+        return num_actions(self.rows, self.cols)
+
+    def reset(self, seeds=None):
+        for conn, part in zip(self.conns, self.slices):
+            conn.send(("reset", None if seeds is None else list(seeds[part])))
+        return self.gather([conn.recv() for conn in self.conns])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        # 先把动作发给所有子进程，再依次收结果，各进程同时推进
+        for conn, part in zip(self.conns, self.slices):
+            conn.send(("step", actions[part]))
+        results = [conn.recv() for conn in self.conns]
+        obs = self.gather([r[0] for r in results])
+        rewards = np.concatenate([r[1] for r in results])
+        dones = np.concatenate([r[2] for r in results])
+        infos = [info for r in results for info in r[3]]
+        return obs, rewards, dones, infos
+
+    @staticmethod
+    def gather(parts):
+        return {name: np.concatenate([p[name] for p in parts]) for name in OBS_FIELDS}
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+        self.conns = []
+        self.procs = []
+
+    def __del__(self):
+        if self.procs:
+            self.close()
+
+
+def make_env(n, workers=0, **kwargs):
+    """workers 为 0 时在本进程推进，否则分到子进程。"""
+    if workers:
+        return SubprocBatchEnv(n, workers, **kwargs)
+    return BatchEnv(n, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="植物大战僵尸批量环境吞吐测试(随机动作)")
+    parser.add_argument("--games", type=int, default=64, help="同时推进的对局数")
+    parser.add_argument("--steps", type=int, default=1000, help="调用 step 的次数")
+    parser.add_argument("--workers", type=int, default=0, help="子进程数，0 表示单进程")
+    parser.add_argument("--level", default="normal")
+    parser.add_argument("--frame-skip", type=int, default=DECISION_INTERVAL, help="每次 step 推进的模拟步数")
+    parser.add_argument("--backend", default="object", choices=["object", "soa"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = make_env(args.games, args.workers, level=args.level, seed=args.seed,
+                   frame_skip=args.frame_skip, backend=args.backend)
+    rng = np.random.default_rng(args.seed)
+    env.reset()
+    episodes = wins = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        actions = rng.integers(0, env.num_actions, args.games)
+        # 一半的时间只收集阳光，让随机玩家也能种下植物
+        actions[rng.random(args.games) < 0.5] = COLLECT
+        _, rewards, dones, _ = env.step(actions)
+        episodes += int(dones.sum())
+        wins += int((rewards > 0).sum())
+    elapsed = time.perf_counter() - start
+    env.close()
+    steps = args.steps * args.games
+    print(f"{steps} 次环境步({steps * args.frame_skip} 模拟步)，用时 {elapsed:.2f}s，"
+          f"{steps / elapsed:.0f} 步/秒，约 {steps / elapsed * 3600 / 1e6:.1f} 百万步/小时")
+    print(f"结束 {episodes} 局，其中胜利 {wins} 局")
+
+
+if __name__ == "__main__":
+    main()
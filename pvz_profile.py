@@ -0,0 +1,157 @@
+"""逐阶段帧分析器：统计主循环各阶段与模拟各子阶段的耗时，以及每步的实体数量。
+
+未挂接时游戏循环不做任何测量；attach() 用实例属性包装被测方法，detach() 恢复原样。
+只保留最近若干帧的数据，退出时可写成 JSON 或 CSV 报告。
+"""
+import csv
+import json
+import time
+from collections import deque
+
+# 模拟子阶段：统计名 -> 被包装的 Simulation 方法
+SIM_PHASES = (
+    ('sim.suns', ('generate_sun', 'update_suns')),
+    ('sim.spawn', ('generate_zombie',)),
+    ('sim.plants', ('update_plants',)),
+    ('sim.bullets', ('update_bullets',)),
+    ('sim.zombies', ('update_zombies',)),
+    ('sim.mowers', ('update_mowers',)),
+)
+# 主循环阶段，tick 由主循环自己计时
+FRAME_PHASES = ('handle_events', 'update', 'draw')
+PHASES = FRAME_PHASES + ('tick',) + tuple(name for name, _ in SIM_PHASES)
+COUNT_FIELDS = ('tick', 'plants', 'zombies', 'bullets', 'suns')
+
+
+def percentile(sorted_values, p):
+    """最近秩百分位数，sorted_values 须已排序。"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class FrameProfiler:
+    """按帧累计各阶段毫秒数；一帧内多次模拟步的子阶段耗时相加。"""
+
+    def __init__(self, window=600, tick_window=3000, refresh=30):
+        self.frames = deque(maxlen=window)  # 每帧 {阶段: 毫秒}，另含 frame 总耗时
+        self.ticks = deque(maxlen=tick_window)  # 每步 (步数, 植物, 僵尸, 子弹, 阳光)
+        self.refresh = refresh  # 屏幕叠加层每隔多少帧刷新一次统计
+        self.current = {}
+        self.frame_count = 0
+        self.last_frame_end = None
+        self.show_overlay = False
+        self.summary_cache = None
+        self.version = 0  # 统计失效次数，绘制层据此判断叠加层是否需要重画
+        self.wrapped = []
+
+    def timed(self, name, fn):
+        perf = time.perf_counter
+        current = self.current
+
+        def wrapper(*args, **kwargs):
+            start = perf()
+            result = fn(*args, **kwargs)
+            current[name] = current.get(name, 0.0) + (perf() - start) * 1000
+            return result
+        return wrapper
+
+    def call(self, name, fn, *args):
+        return self.timed(name, fn)(*args)
+
+    def attach(self, game):
+        """包装 game 的主循环阶段与模拟子阶段；game 可以是没有界面的 Simulation。"""
+        self.detach()
+        for name in FRAME_PHASES:
+            self._wrap(game, name, name)
+        for name, methods in SIM_PHASES:
+            for method in methods:
+                self._wrap(game, method, name)
+        compact = game.compact
+
+        def record_counts():
+            compact()
+            self.ticks.append((game.clock.ticks, len(game.plants), len(game.zombies),
+                               len(game.bullets), len(game.suns)))
+        game.compact = record_counts
+        self.wrapped.append((game, 'compact'))
+
+    def _wrap(self, obj, attr, name):
+        if hasattr(obj, attr):
+            setattr(obj, attr, self.timed(name, getattr(obj, attr)))
+            self.wrapped.append((obj, attr))
+
+    def detach(self):
+        for obj, attr in self.wrapped:
+            obj.__dict__.pop(attr, None)
+        self.wrapped = []
+
+    def end_frame(self):
+        now = time.perf_counter()
+        if self.last_frame_end is not None:
+            self.current['frame'] = (now - self.last_frame_end) * 1000
+            self.frames.append(dict(self.current))
+            self.frame_count += 1
+            if self.frame_count % self.refresh == 0:
+                self.summary_cache = None
+                self.version += 1
+        self.current.clear()
+        self.last_frame_end = now
+
+    def summary(self):
+        """各阶段耗时统计：{阶段: {mean, p50, p95, p99, max}}，单位毫秒。"""
+        if self.summary_cache is None:
+            stats = {}
+            for name in ('frame',) + PHASES:
+                values = sorted(f.get(name, 0.0) for f in self.frames)
+                if not values:
+                    continue
+                stats[name] = {
+                    'mean': sum(values) / len(values),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                    'p99': percentile(values, 99),
+                    'max': values[-1],
+                }
+            self.summary_cache = stats
+        return self.summary_cache
+
+    def overlay_lines(self):
+        stats = self.summary()
+        if 'frame' not in stats:
+            return ["性能统计: 采样中..."]
+
+        def mean(name):
+            return stats.get(name, {}).get('mean', 0.0)
+        frame = stats['frame']
+        lines = [
+            f"帧耗时 p50 {frame['p50']:.1f}  p95 {frame['p95']:.1f}  p99 {frame['p99']:.1f} ms",
+            f"事件 {mean('handle_events'):.2f}  更新 {mean('update'):.2f}  "
+            f"绘制 {mean('draw'):.2f}  等待 {mean('tick'):.2f} ms",
+            f"阳光 {mean('sim.suns'):.2f}  出怪 {mean('sim.spawn'):.2f}  植物 {mean('sim.plants'):.2f}  "
+            f"子弹 {mean('sim.bullets'):.2f}  僵尸 {mean('sim.zombies'):.2f}  "
+            f"小推车 {mean('sim.mowers'):.2f}",
+        ]
+        if self.ticks:
+            _, plants, zombies, bullets, suns = self.ticks[-1]
+            lines.append(f"植物 {plants}  僵尸 {zombies}  子弹 {bullets}  阳光 {suns}")
+        return lines
+
+    def write_report(self, path):
+        """写出最近窗口内的数据：.csv 为逐帧明细，其余为 JSON 汇总加明细。"""
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(('frame',) + PHASES)
+                for frame in self.frames:
+                    writer.writerow([round(frame.get(name, 0.0), 4) for name in ('frame',) + PHASES])
+            return
+        self.summary_cache = None
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'frames': len(self.frames),
+                'summary': self.summary(),
+                'frame_ms': list(self.frames),
+                'counts': [dict(zip(COUNT_FIELDS, t)) for t in self.ticks],
+            }, f, ensure_ascii=False, indent=2)
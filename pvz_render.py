@@ -0,0 +1,855 @@
+"""绘制层：读取 Simulation 的状态并画到 pygame Surface 上，不修改游戏状态。"""
+import os
+from collections import OrderedDict
+from operator import attrgetter
+
+import pygame
+
+from pvz_core import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE, GRID_ROWS,
+    GRID_OFFSET_X, GRID_OFFSET_Y,
+    Sunflower, Peashooter, WallNut, Zombie, FastZombie, TankZombie,
+)
+
+# 游戏资源路径；放入 font.ttf 即使用随游戏附带的字体，不再查找系统字体
+RESOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+BUNDLED_FONT = os.path.join(RESOURCE_DIR, "font.ttf")
+SYSTEM_FONT = 'SimHei'
+
+# 颜色
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+BROWN = (139, 69, 19)
+
+# 草坪配色: (浅格, 深格, 格线)
+LAWN_COLORS = ((200, 255, 200), (180, 255, 180), (100, 200, 100))
+# 按钮层中代表透明的颜色键
+CHROME_COLORKEY = (255, 0, 255)
+
+# 性能统计叠加层位于草坪下方的空白区域
+PROFILER_PANEL = pygame.Rect(0, GRID_OFFSET_Y + GRID_ROWS * GRID_SIZE,
+                             SCREEN_WIDTH, SCREEN_HEIGHT - GRID_OFFSET_Y - GRID_ROWS * GRID_SIZE)
+
+# 关卡按钮
+MENU_BUTTON_SIZE = (180, 60)
+LEVEL_LABELS = [('easy', '简单'), ('normal', '普通'), ('hard', '困难')]
+
+# 植物选择按钮: (种类, 按钮x, 选中颜色, 默认颜色)
+PLANT_BUTTON_SIZE = (100, 60)
+PLANT_BUTTON_Y = 20
+PLANT_BUTTONS = [
+    ("sunflower", 50, (255, 255, 0), (220, 220, 0)),
+    ("peashooter", 170, (0, 200, 0), (0, 150, 0)),
+    ("wallnut", 290, BROWN, (100, 50, 0)),
+]
+
+
+# 字体文件只解析一次，同一字号的 Font 对象在所有绘制器与重开之间共用
+font_file = None  # 命令行指定的字体文件
+_font_path = None
+_fonts = {}
+
+
+def set_font_file(path):
+    global font_file, _font_path
+    font_file = path
+    _font_path = None
+    _fonts.clear()
+
+
+def font_path():
+    """依次使用指定的字体、附带的字体和系统中的 SimHei；都没有时用 pygame 默认字体。"""
+    global _font_path
+    if _font_path is None:
+        if font_file:
+            _font_path = font_file
+        elif os.path.exists(BUNDLED_FONT):
+            _font_path = BUNDLED_FONT
+        else:
+            # 查找系统字体要扫描字体目录，较慢
+            _font_path = pygame.font.match_font(SYSTEM_FONT) or ''
+    return _font_path or None
+
+
+def get_font(size):
+    font = _fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[size] = pygame.font.Font(font_path(), size)
+    return font
+
+
+def menu_button_rects():
+    """主菜单中三个关卡按钮的位置。"""
+    btn_w, btn_h = MENU_BUTTON_SIZE
+    top_y = SCREEN_HEIGHT//2 - 120
+    return [(key, label, pygame.Rect(SCREEN_WIDTH//2 - btn_w//2, top_y + i*80, btn_w, btn_h))
+            for i, (key, label) in enumerate(LEVEL_LABELS)]
+
+
+def top_button_rects():
+    """顶部功能按钮布局。"""
+    return {
+        'pause': pygame.Rect(SCREEN_WIDTH - 330, 50, 90, 36),
+        'restart': pygame.Rect(SCREEN_WIDTH - 230, 50, 90, 36),
+        'menu': pygame.Rect(SCREEN_WIDTH - 130, 50, 90, 36)
+    }
+
+
+# 以下绘制函数在 (x, y) 处画出实体的外观(不含健康条)，只在生成精灵时调用一次
+
+def paint_plant(surface, x, y, state):
+    # 默认植物绘制
+    pygame.draw.rect(surface, GREEN, (x, y, GRID_SIZE, GRID_SIZE), 0)
+    pygame.draw.rect(surface, BLACK, (x, y, GRID_SIZE, GRID_SIZE), 2)
+
+
+def paint_sunflower(surface, x, y, state):
+    pygame.draw.rect(surface, (255, 255, 0), (x, y, GRID_SIZE, GRID_SIZE), 0)
+    pygame.draw.rect(surface, BLACK, (x, y, GRID_SIZE, GRID_SIZE), 2)
+
+    # 绘制脸
+    face_center = (x + GRID_SIZE//2, y + GRID_SIZE//2)
+    pygame.draw.circle(surface, (139, 69, 19), face_center, GRID_SIZE//3)
+
+    # 绘制花瓣
+    petal_radius = GRID_SIZE//4
+    pygame.draw.circle(surface, (255, 255, 0), (face_center[0], face_center[1] - petal_radius), petal_radius)
+    pygame.draw.circle(surface, (255, 255, 0), (face_center[0] + petal_radius, face_center[1]), petal_radius)
+    pygame.draw.circle(surface, (255, 255, 0), (face_center[0], face_center[1] + petal_radius), petal_radius)
+    pygame.draw.circle(surface, (255, 255, 0), (face_center[0] - petal_radius, face_center[1]), petal_radius)
+
+
+def paint_peashooter(surface, x, y, state):
+    pygame.draw.rect(surface, (0, 200, 0), (x, y, GRID_SIZE, GRID_SIZE), 0)
+    pygame.draw.rect(surface, BLACK, (x, y, GRID_SIZE, GRID_SIZE), 2)
+
+    # 绘制头部
+    head_center = (x + GRID_SIZE*2//3, y + GRID_SIZE//2)
+    pygame.draw.circle(surface, (0, 100, 0), head_center, GRID_SIZE//3)
+
+    # 绘制嘴巴(发射口)
+    pygame.draw.circle(surface, BLACK, (head_center[0] + GRID_SIZE//4, head_center[1]), GRID_SIZE//8)
+
+
+def paint_wallnut(surface, x, y, tier):
+    pygame.draw.rect(surface, BROWN, (x, y, GRID_SIZE, GRID_SIZE), 0)
+    pygame.draw.rect(surface, BLACK, (x, y, GRID_SIZE, GRID_SIZE), 2)
+
+    # 绘制面部特征
+    face_center = (x + GRID_SIZE//2, y + GRID_SIZE//2)
+
+    # 眼睛
+    pygame.draw.circle(surface, BLACK, (face_center[0] - 10, face_center[1] - 10), 5)
+    pygame.draw.circle(surface, BLACK, (face_center[0] + 10, face_center[1] - 10), 5)
+
+    # 根据健康程度绘制不同表情
+    if tier == 0:
+        # 微笑
+        pygame.draw.arc(surface, BLACK, (face_center[0] - 15, face_center[1], 30, 20), 0, 3.14, 2)
+    elif tier == 1:
+        # 平淡
+        pygame.draw.line(surface, BLACK, (face_center[0] - 15, face_center[1] + 10),
+                         (face_center[0] + 15, face_center[1] + 10), 2)
+    else:
+        # 忧虑
+        pygame.draw.arc(surface, BLACK, (face_center[0] - 15, face_center[1] + 10, 30, 20), 3.14, 6.28, 2)
+
+
+def wallnut_tier(plant):
+    return 0 if plant.health > 266 else (1 if plant.health > 133 else 2)
+
+
+def paint_bullet(surface, x, y, state):
+    pygame.draw.circle(surface, (0, 255, 0), (x, y), 5)
+
+
+def paint_sun(surface, x, y, radius):
+    pygame.draw.circle(surface, (255, 255, 0), (x, y), radius)
+    pygame.draw.circle(surface, (255, 200, 0), (x, y), radius - 5)
+
+
+def paint_zombie(surface, x, y, attacking):
+    zombie_color = (150, 150, 150)
+    pygame.draw.rect(surface, zombie_color, (x - 30, y, 30, GRID_SIZE), 0)
+
+    # 头部
+    head_y = y + 10
+    pygame.draw.circle(surface, zombie_color, (x - 15, head_y), 20)
+
+    # 眼睛
+    eye_offset = 5 if attacking else 0
+    pygame.draw.circle(surface, RED, (x - 20 + eye_offset, head_y - 5), 5)
+    pygame.draw.circle(surface, RED, (x - 5 + eye_offset, head_y - 5), 5)
+
+    # 嘴巴
+    mouth_y = head_y + 10
+    pygame.draw.rect(surface, (100, 0, 0), (x - 25, mouth_y, 20, 5))
+
+
+def paint_fast_zombie(surface, x, y, state):
+    color = (120, 160, 120)
+    pygame.draw.rect(surface, color, (x - 28, y + 5, 28, GRID_SIZE - 10), 0)
+    pygame.draw.circle(surface, color, (x - 14, y + 15), 18)
+
+
+def paint_tank_zombie(surface, x, y, state):
+    color = (100, 100, 100)
+    pygame.draw.rect(surface, color, (x - 35, y - 5, 35, GRID_SIZE + 10), 0)
+    pygame.draw.circle(surface, color, (x - 18, y + 5), 22)
+
+
+def paint_lawn_mower(surface, x, y, size):
+    width, height = size
+    body_rect = pygame.Rect(x, y, width, height)
+    pygame.draw.rect(surface, (180, 180, 180), body_rect)
+    pygame.draw.rect(surface, BLACK, body_rect, 2)
+    # 车轮
+    wheel_r = height // 6
+    pygame.draw.circle(surface, BLACK, (int(x + width*0.2), y + height), wheel_r)
+    pygame.draw.circle(surface, BLACK, (int(x + width*0.8), y + height), wheel_r)
+
+
+# 精灵种类: (绘制函数, 锚点x, 锚点y, 宽, 高)，锚点是实体坐标在精灵内的位置
+PLANT_BOX = (8, 8, GRID_SIZE + 16, GRID_SIZE + 16)
+ZOMBIE_BOX = (50, 25, 70, GRID_SIZE + 40)
+SPRITE_KINDS = {
+    'plant': (paint_plant,) + PLANT_BOX,
+    'sunflower': (paint_sunflower,) + PLANT_BOX,
+    'peashooter': (paint_peashooter,) + PLANT_BOX,
+    'wallnut': (paint_wallnut,) + PLANT_BOX,
+    'zombie': (paint_zombie,) + ZOMBIE_BOX,
+    'fast_zombie': (paint_fast_zombie,) + ZOMBIE_BOX,
+    'tank_zombie': (paint_tank_zombie,) + ZOMBIE_BOX,
+    'bullet': (paint_bullet, 6, 6, 12, 12),
+    'sun': (paint_sun, 24, 24, 48, 48),
+    'mower': (paint_lawn_mower, 8, 8, GRID_SIZE // 2 + 16, GRID_SIZE // 2 + 16),
+}
+
+# 实体类型 -> (精灵种类, 取外观状态的函数, 健康条(dx, dy, 宽, 高))
+ENTITY_LOOKS = {
+    Sunflower: ('sunflower', None, (5, 5, GRID_SIZE - 10, 5)),
+    Peashooter: ('peashooter', None, (5, 5, GRID_SIZE - 10, 5)),
+    WallNut: ('wallnut', wallnut_tier, (5, 5, GRID_SIZE - 10, 5)),
+    Zombie: ('zombie', lambda z: z.attacking, (-30, -10, 30, 5)),
+    FastZombie: ('fast_zombie', None, (-28, -10, 28, 5)),
+    TankZombie: ('tank_zombie', None, (-35, -12, 35, 6)),
+}
+DEFAULT_LOOK = ('plant', None, (5, 5, GRID_SIZE - 10, 5))
+
+
+# 健康条从图集中的红色色块截取，色块不窄于最宽的健康条
+HEALTH_BAR_BLOCK = GRID_SIZE
+
+
+class TextureAtlas:
+    """一张带透明通道的大 Surface，小图按行(货架)依次放入，以引用其区域的子 Surface 取用。
+
+    放不下时高度加倍、把已有内容原样搬过去，并重新生成全部子 Surface。
+    """
+
+    def __init__(self, width=1024, height=256):
+        self.width = width
+        self.height = height
+        self.surface = None  # 第一次放入时创建，以便在显示设备就绪后转换像素格式
+        self.rects = {}  # 键 -> 图集中的区域
+        self.regions = {}  # 键 -> 子 Surface
+        self.x = self.y = self.shelf_height = 0
+
+    def new_surface(self, height):
+        surface = pygame.Surface((self.width, height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        return surface
+
+    def add(self, key, w, h):
+        """为 key 分配 w x h 的透明区域，返回它的子 Surface，调用方在上面作画。"""
+        if self.surface is None:
+            self.surface = self.new_surface(self.height)
+        if self.x + w > self.width:
+            self.x, self.y, self.shelf_height = 0, self.y + self.shelf_height, 0
+        if self.y + h > self.surface.get_height():
+            self.grow(self.y + h)
+        rect = pygame.Rect(self.x, self.y, w, h)
+        self.x += w
+        self.shelf_height = max(self.shelf_height, h)
+        self.rects[key] = rect
+        region = self.regions[key] = self.surface.subsurface(rect)
+        return region
+
+    def carve(self, key, parent, w, h):
+        """key 取 parent 区域左上角 w x h 的部分，不另占空间。"""
+        rect = self.rects[key] = pygame.Rect(self.rects[parent].topleft, (w, h))
+        region = self.regions[key] = self.surface.subsurface(rect)
+        return region
+
+    def grow(self, min_height):
+        height = self.surface.get_height()
+        while height < min_height:
+            height *= 2
+        surface = self.new_surface(height)
+        # 目标全透明，取各通道最大值即逐像素复制，不经过透明度混合
+        surface.blit(self.surface, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        self.surface = surface
+        self.regions = {key: surface.subsurface(rect) for key, rect in self.rects.items()}
+
+
+class SpriteCache:
+    """每种外观(种类+状态)只绘制一次，放进同一张图集。
+
+    每帧把要画的外观与健康条整理成 (子 Surface, 位置) 序列，按原顺序用一次
+    Surface.fblits(pygame-ce)或 Surface.blits 提交，每个实体不再各自调用绘制函数。
+    """
+
+    def __init__(self):
+        self.atlas = TextureAtlas()
+
+    def get(self, kind, state=None):
+        sprite = self.atlas.regions.get((kind, state))
+        if sprite is None:
+            paint, ax, ay, w, h = SPRITE_KINDS[kind]
+            sprite = self.atlas.add((kind, state), w, h)
+            paint(sprite, ax, ay, state)
+        return sprite
+
+    def bar(self, width, height):
+        """宽 width 的健康条：各个宽度共用同一高度的红色色块。"""
+        key = ('bar', width, height)
+        sprite = self.atlas.regions.get(key)
+        if sprite is None:
+            block = ('bar', height)
+            if block not in self.atlas.rects:
+                self.atlas.add(block, HEALTH_BAR_BLOCK, height).fill(RED)
+            sprite = self.atlas.carve(key, block, width, height)
+        return sprite
+
+    def rect(self, kind, x, y):
+        """精灵在屏幕上覆盖的区域(包含健康条)。"""
+        _, ax, ay, w, h = SPRITE_KINDS[kind]
+        return pygame.Rect(int(x) - ax, int(y) - ay, w, h)
+
+    def blit_sequence(self, items):
+        """场景项对应的 [(子 Surface, 屏幕位置)]：每项先是外观，再是叠加其上的健康条。
+
+        位置与健康条宽度按 pygame.Rect 的规则向零取整，与逐个 blit、draw.rect 画出的像素相同。
+        """
+        regions = self.atlas.regions
+        seq = []
+        append = seq.append
+        for kind, state, x, y, bar in items:
+            sprite = regions.get((kind, state))
+            if sprite is None:
+                sprite = self.get(kind, state)
+                regions = self.atlas.regions  # 放入新精灵后图集可能已重建
+            _, ax, ay, _, _ = SPRITE_KINDS[kind]
+            append((sprite, (int(x) - ax, int(y) - ay)))
+            if bar is not None:
+                bx, by, width, health, max_health, height = bar
+                w = int(width * (health / max_health))
+                if w > 0:
+                    key = ('bar', w if w < HEALTH_BAR_BLOCK else HEALTH_BAR_BLOCK, int(height))
+                    sprite = regions.get(key)
+                    if sprite is None:
+                        sprite = self.bar(key[1], key[2])
+                        regions = self.atlas.regions
+                    append((sprite, (int(bx), int(by))))
+        return seq
+
+    def draw_items(self, surface, items):
+        seq = self.blit_sequence(items)
+        fblits = getattr(surface, 'fblits', None)
+        if fblits is not None:
+            fblits(seq)
+        else:
+            surface.blits(seq, doreturn=False)
+
+
+def entity_item(entity):
+    """植物或僵尸对应的场景项 (精灵种类, 状态, x, y, 健康条参数)。"""
+    kind, state_of, (dx, dy, width, height) = ENTITY_LOOKS.get(type(entity), DEFAULT_LOOK)
+    return (kind, state_of(entity) if state_of else None, entity.x, entity.y,
+            (entity.x + dx, entity.y + dy, width, entity.health, entity.max_health, height))
+
+
+class MotionBuffer:
+    """上一个模拟步结束时各移动实体的位置。
+
+    模拟按固定步长推进、绘制按显示帧率进行，两帧之间通常不足或多于一步；
+    绘制时在上一步与当前位置之间按 alpha(距上一步已过去的步长比例)插值，运动才显得平滑。
+    每次记录都换成新的字典，绘制读取的始终是完整的一份。
+    """
+
+    def __init__(self):
+        self.prev = {}
+        self.alpha = 1.0
+
+    def clear(self):
+        self.prev = {}
+        self.alpha = 1.0
+
+    @staticmethod
+    def key(entity):
+        # 子弹与阳光对象会被对象池复用，按句柄区分；小推车每行一辆
+        handle = getattr(entity, 'handle', None)
+        return type(entity), handle if handle is not None else entity.row
+
+    def capture(self, game):
+        """记录当前视口附近的移动实体；其余实体本来就不会被绘制。"""
+        key = self.key
+        prev = {}
+        _, bullets, suns, zombies, mowers = visible_entities(game, getattr(game, 'camera', None))
+        for store in (zombies, bullets, suns, mowers):
+            prev.update((key(e), (e.x, e.y)) for e in store)
+        self.prev = prev
+
+    def shift(self, item, entity):
+        """把场景项从当前位置挪回到插值位置；上一步还不存在的实体画在当前位置。"""
+        p = self.prev.get(self.key(entity))
+        if p is None:
+            return item
+        t = 1 - self.alpha
+        return shift_item(item, (item[2] - p[0]) * t, (item[3] - p[1]) * t)
+
+
+def active_motion(game):
+    """需要插值时返回 game 的 MotionBuffer，否则返回 None(按当前位置绘制)。"""
+    motion = getattr(game, 'motion', None)
+    if motion is None or motion.alpha >= 1 or not motion.prev:
+        return None
+    return motion
+
+
+def moved(item, entity, motion):
+    return item if motion is None else motion.shift(item, entity)
+
+
+def scene_entities(game):
+    """战斗画面中要绘制的全部实体，按绘制顺序分为植物、子弹、阳光、僵尸、小推车五组。"""
+    return (list(game.plants), list(game.bullets), [sun for sun in game.suns if not sun.collected],
+            list(game.zombies), [m for m in game.lawn_mowers if m.active])
+
+
+def entity_items(entities, motion):
+    plants, bullets, suns, zombies, mowers = entities
+    items = [entity_item(plant) for plant in plants]
+    items.extend(moved(('bullet', None, b.x, b.y, None), b, motion) for b in bullets)
+    items.extend(moved(('sun', sun.radius, sun.x, sun.y, None), sun, motion) for sun in suns)
+    items.extend(moved(entity_item(z), z, motion) for z in zombies)
+    items.extend(moved(('mower', (m.width, m.height), m.x, m.y, None), m, motion) for m in mowers)
+    return items
+
+
+def scene_items(game):
+    """按绘制顺序列出战斗画面中的所有实体：植物、子弹、阳光、僵尸、小推车。"""
+    return entity_items(scene_entities(game), active_motion(game))
+
+
+class Camera:
+    """视口左上角在世界坐标中的位置。顶部按钮条固定在屏幕上，不随视口移动。"""
+
+    def __init__(self, board, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.board = board
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+
+    def covers_board(self):
+        return self.board.width <= self.width and self.board.height <= self.height
+
+    def scroll(self, dx, dy):
+        self.x = min(max(0, self.x + dx), max(0, self.board.width - self.width))
+        self.y = min(max(0, self.y + dy), max(0, self.board.height - self.height))
+
+    def to_world(self, x, y):
+        return x + self.x, y + self.y
+
+
+def shift_item(item, dx, dy):
+    kind, state, x, y, bar = item
+    if bar is not None:
+        bar = (bar[0] - dx, bar[1] - dy) + bar[2:]
+    return (kind, state, x - dx, y - dy, bar)
+
+
+def visible_entities(game, camera):
+    """视口附近要绘制的实体，分组与顺序同 scene_entities；整个草坪都可见时就是 scene_entities。
+
+    植物按可见格子取，僵尸按可见行在行索引中二分查找，子弹只看可见行，
+    落定的阳光查空间哈希中与视口相交的格子，另加下落中的；开销只与可见部分有关。
+    """
+    if camera is None or camera.covers_board():
+        return scene_entities(game)
+    x0, y0, x1, y1 = view_box(camera)
+    board = game.board
+    rows = range(max(0, (y0 - GRID_OFFSET_Y) // GRID_SIZE),
+                 min(board.rows, (y1 - GRID_OFFSET_Y) // GRID_SIZE + 1))
+    c0 = max(0, (x0 - GRID_OFFSET_X) // GRID_SIZE)
+    c1 = min(board.cols, (x1 - GRID_OFFSET_X) // GRID_SIZE + 1)
+
+    # 可见的实体按它们在容器中的顺序绘制，重叠处与整屏绘制一致
+    plants = [plant for row in rows for plant in game.grid.cells[row][c0:c1] if plant is not None]
+    plants.sort(key=attrgetter('index'))
+    bullets = [b for b in game.bullets.in_rows(rows) if x0 <= b.x <= x1]
+    suns = [game.suns.get(handle) for handle in game.sun_hash.in_box(x0, y0, x1, y1)]
+    suns.extend(game.falling_suns)
+    suns = [sun for sun in suns if not sun.collected and x0 <= sun.x <= x1 and y0 <= sun.y <= y1]
+    suns.sort(key=attrgetter('index'))
+    if hasattr(game.lanes, 'in_range'):
+        zombies = [z for row in rows for z in game.lanes.in_range(row, x0, x1)]
+        zombies.sort(key=attrgetter('index'))
+    else:
+        zombies = [z for z in game.zombies if z.row in rows and x0 <= z.x <= x1]
+    mowers = [m for m in (game.lawn_mowers[row] for row in rows) if m.active and x0 <= m.x <= x1]
+    return plants, bullets, suns, zombies, mowers
+
+
+def view_box(camera):
+    """视口在世界坐标中的范围 (x0, y0, x1, y1)，四周各放宽一格：精灵比锚点多出的部分不超过一格。"""
+    x, y = camera.x, camera.y
+    return x - GRID_SIZE, y - GRID_SIZE, x + camera.width + GRID_SIZE, y + camera.height + GRID_SIZE
+
+
+def visible_items(game, camera):
+    """视口附近的场景项，已换算为屏幕坐标；整个草坪都可见时与 scene_items 相同。"""
+    if camera is None or camera.covers_board():
+        return scene_items(game)
+    items = entity_items(visible_entities(game, camera), active_motion(game))
+    return [shift_item(item, camera.x, camera.y) for item in items]
+
+
+class TextCache:
+    """按 (字体, 文字, 颜色) 缓存渲染好的文字，超过容量时淘汰最久未用的条目。
+
+    中文字形光栅化较慢，静态标签只渲染一次，阳光数、波数等动态文字只在数值变化时重新渲染。
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            return surface
+        surface = font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return surface
+
+
+class Renderer:
+    """把一局游戏的状态画到屏幕上，字体等绘制资源都由它持有。"""
+
+    def __init__(self):
+        self.font = get_font(24)
+        self.large_font = get_font(48)
+        self.small_font = get_font(18)
+        self.bg_color = (220, 255, 220)
+        self.lawn_colors = LAWN_COLORS
+        self.sprites = SpriteCache()
+        self.texts = TextCache()
+        self.overlays = {}
+        # 静态图层：草坪背景与按钮层，仅在布局或配色变化时重建
+        self.background = None
+        self.background_key = None
+        self.lawn_pattern = None
+        self.lawn_pattern_key = None
+        self.chrome = None
+        self.chrome_key = None
+
+    def draw(self, surface, game):
+        # 菜单界面
+        if game.show_menu:
+            surface.fill(self.bg_color)
+            self.draw_menu(surface)
+            pygame.display.flip()
+            return
+
+        # 清屏并绘制草坪网格背景
+        camera = getattr(game, 'camera', None)
+        surface.blit(self.get_background(surface.get_size(), game.board, camera), (0, 0))
+
+        # 绘制视口内的植物、子弹、阳光、僵尸与小推车
+        self.sprites.draw_items(surface, visible_items(game, camera))
+
+        # 绘制UI
+        self.draw_ui(surface, game)
+
+        # 如果游戏结束，显示结束画面
+        if game.game_over:
+            self.draw_game_over(surface)
+        elif game.game_win:
+            self.draw_game_win(surface)
+        elif game.paused:
+            self.draw_pause(surface)
+
+        # 性能统计叠加层
+        self.draw_profiler(surface, game)
+
+        pygame.display.flip()
+
+    def get_background(self, size, board, camera=None):
+        """当前视口的草坪背景；摄像机移动时由预先画好的棋盘图案拼出，不逐格重画。"""
+        cx, cy = (camera.x, camera.y) if camera is not None else (0, 0)
+        key = (size, self.bg_color, self.lawn_colors, board.rows, board.cols, cx, cy,
+               GRID_SIZE, GRID_OFFSET_X, GRID_OFFSET_Y)
+        if key != self.background_key:
+            background = pygame.Surface(size)
+            background.fill(self.bg_color)
+            lawn = pygame.Rect(GRID_OFFSET_X - cx, GRID_OFFSET_Y - cy,
+                               board.cols * GRID_SIZE, board.rows * GRID_SIZE)
+            clip = lawn.clip(background.get_rect())
+            if clip:
+                # 棋盘图案以两格为周期，从与首个可见格同色的位置开始取
+                col = (clip.x - lawn.x) // GRID_SIZE
+                row = (clip.y - lawn.y) // GRID_SIZE
+                area = pygame.Rect((col + row) % 2 * GRID_SIZE + (clip.x - lawn.x) % GRID_SIZE,
+                                   (clip.y - lawn.y) % GRID_SIZE, clip.w, clip.h)
+                background.blit(self.get_lawn_pattern(size), clip, area)
+            if pygame.display.get_surface() is not None:
+                background = background.convert()
+            self.background, self.background_key = background, key
+        return self.background
+
+    def get_lawn_pattern(self, size):
+        """足以覆盖整个视口的棋盘格图案，左上角为浅色格。"""
+        key = (size, self.lawn_colors)
+        if key != self.lawn_pattern_key:
+            cols = size[0] // GRID_SIZE + 3
+            rows = size[1] // GRID_SIZE + 2
+            pattern = pygame.Surface((cols * GRID_SIZE, rows * GRID_SIZE))
+            light, dark, line = self.lawn_colors
+            for row in range(rows):
+                for col in range(cols):
+                    rect = pygame.Rect(col * GRID_SIZE, row * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+                    pygame.draw.rect(pattern, light if (row + col) % 2 == 0 else dark, rect)
+                    pygame.draw.rect(pattern, line, rect, 1)
+            self.lawn_pattern, self.lawn_pattern_key = pattern, key
+        return self.lawn_pattern
+
+    def get_chrome(self, game):
+        """顶部功能按钮与未选中的植物按钮，画在以颜色键透明的顶部条带上。"""
+        key = (tuple((name, tuple(rect)) for name, rect in game.ui_buttons.items()),
+               tuple((kind, game.plant_types[kind]['name'], game.plant_types[kind]['cost'])
+                     for kind, *_ in PLANT_BUTTONS))
+        if key != self.chrome_key:
+            chrome = pygame.Surface((SCREEN_WIDTH, GRID_OFFSET_Y))
+            chrome.fill(CHROME_COLORKEY)
+            chrome.set_colorkey(CHROME_COLORKEY, pygame.RLEACCEL)
+
+            # 功能按钮（暂停/重开/主菜单）
+            def draw_btn(rect, label, color):
+                pygame.draw.rect(chrome, color, rect)
+                pygame.draw.rect(chrome, BLACK, rect, 2)
+                t = self.text(self.font, label, BLACK)
+                chrome.blit(t, (rect.centerx - t.get_width()//2, rect.centery - t.get_height()//2))
+            draw_btn(game.ui_buttons['pause'], '暂停/继续', (230, 230, 230))
+            draw_btn(game.ui_buttons['restart'], '重新开始', (230, 230, 230))
+            draw_btn(game.ui_buttons['menu'], '主菜单', (230, 230, 230))
+
+            for kind, button_x, _, color in PLANT_BUTTONS:
+                self.draw_plant_button(chrome, game, kind, button_x, color)
+            self.chrome, self.chrome_key = chrome, key
+        return self.chrome
+
+    def draw_plant_button(self, surface, game, kind, button_x, color):
+        button_width, button_height = PLANT_BUTTON_SIZE
+        button_y = PLANT_BUTTON_Y
+        pygame.draw.rect(surface, color, (button_x, button_y, button_width, button_height))
+        pygame.draw.rect(surface, BLACK, (button_x, button_y, button_width, button_height), 2)
+        plant_text = self.text(self.font, game.plant_types[kind]['name'], BLACK)
+        cost_text = self.text(self.font, f"{game.plant_types[kind]['cost']}", BLACK)
+        surface.blit(plant_text, (button_x + 10, button_y + 10))
+        surface.blit(cost_text, (button_x + 10, button_y + 35))
+
+    def draw_menu(self, surface):
+        title = self.text(self.large_font, '选择关卡', BLACK)
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, SCREEN_HEIGHT//2 - 200))
+        colors = [(180, 255, 180), (160, 240, 160), (140, 220, 140)]
+        for i, (key, label, rect) in enumerate(menu_button_rects()):
+            pygame.draw.rect(surface, colors[i], rect)
+            pygame.draw.rect(surface, BLACK, rect, 2)
+            txt = self.text(self.font, label, BLACK)
+            surface.blit(txt, (rect.centerx - txt.get_width()//2, rect.centery - txt.get_height()//2))
+
+    def draw_ui(self, surface, game):
+        # 绘制阳光数量
+        sun_text = self.text(self.font, f"阳光: {game.sun_count}", BLACK)
+        surface.blit(sun_text, (10, 1))
+
+        # 绘制波数
+        wave_text = self.text(self.font, f"波数: {game.wave_count}/{game.max_waves}", BLACK)
+        surface.blit(wave_text, (SCREEN_WIDTH - 150, 1))
+
+        # 绘制当前关卡
+        if game.level:
+            level_map = dict(LEVEL_LABELS)
+            lvl_text = self.text(self.font, f"关卡: {level_map.get(game.level, '')}", BLACK)
+            surface.blit(lvl_text, (SCREEN_WIDTH - 300, 1))
+
+        # 快进倍率
+        if game.speed != 1:
+            speed_label = f"x{game.speed}" if game.speed else "极速"
+            speed_text = self.text(self.font, f"快进 {speed_label}", BLACK)
+            surface.blit(speed_text, (SCREEN_WIDTH - 450, 1))
+
+        # 临时提示(如读档失败)，画在植物按钮下方
+        notice = getattr(game, 'notice', None)
+        if notice:
+            notice_text = self.text(self.small_font, notice, RED)
+            surface.blit(notice_text, (10, PLANT_BUTTON_Y + PLANT_BUTTON_SIZE[1] + 1))
+
+        # 功能按钮与植物选择按钮(缓存图层)，选中的植物按钮高亮重画
+        surface.blit(self.get_chrome(game), (0, 0))
+        for kind, button_x, selected_color, _ in PLANT_BUTTONS:
+            if game.selected_plant == kind:
+                self.draw_plant_button(surface, game, kind, button_x, selected_color)
+
+    def text(self, font, text, color):
+        return self.texts.render(font, text, color)
+
+    def draw_overlay(self, surface, color, alpha):
+        # 半透明遮罩只创建一次
+        overlay = self.overlays.get((color, alpha))
+        if overlay is None:
+            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            overlay.set_alpha(alpha)
+            overlay.fill(color)
+            self.overlays[(color, alpha)] = overlay
+        surface.blit(overlay, (0, 0))
+
+    def draw_game_over(self, surface):
+        self.draw_overlay(surface, BLACK, 180)
+
+        game_over_text = self.text(self.large_font, "游戏结束!", RED)
+        restart_text = self.text(self.font, "按 R 键重新开始", WHITE)
+
+        surface.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2,
+                                     SCREEN_HEIGHT//2 - game_over_text.get_height()//2))
+        surface.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2,
+                                   SCREEN_HEIGHT//2 + 50))
+
+    def draw_game_win(self, surface):
+        self.draw_overlay(surface, BLUE, 180)
+
+        win_text = self.text(self.large_font, "胜利!", WHITE)
+        restart_text = self.text(self.font, "按 R 键重新开始", WHITE)
+
+        surface.blit(win_text, (SCREEN_WIDTH//2 - win_text.get_width()//2,
+                               SCREEN_HEIGHT//2 - win_text.get_height()//2))
+        surface.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2,
+                                   SCREEN_HEIGHT//2 + 50))
+
+    def draw_pause(self, surface):
+        self.draw_overlay(surface, (50, 50, 50), 160)
+        pause_text = self.text(self.large_font, "暂停", WHITE)
+        tips_text = self.text(self.font, "点击顶部按钮：暂停/继续、重新开始、主菜单", WHITE)
+        surface.blit(pause_text, (SCREEN_WIDTH//2 - pause_text.get_width()//2,
+                                  SCREEN_HEIGHT//2 - pause_text.get_height()//2 - 20))
+        surface.blit(tips_text, (SCREEN_WIDTH//2 - tips_text.get_width()//2,
+                                 SCREEN_HEIGHT//2 + 20))
+
+
+    def draw_profiler(self, surface, game):
+        profiler = getattr(game, 'profiler', None)
+        if profiler is None or not profiler.show_overlay:
+            return
+        x, y = PROFILER_PANEL.topleft
+        for line in profiler.overlay_lines():
+            text = self.text(self.small_font, line, BLACK)
+            surface.blit(text, (x + 4, y))
+            y += text.get_height()
+
+
+def screen_mode(game):
+    """当前画面状态：菜单、战斗、暂停或结束画面。"""
+    if game.show_menu:
+        return 'menu'
+    if game.game_over:
+        return 'over'
+    if game.game_win:
+        return 'win'
+    return 'paused' if game.paused else 'play'
+
+
+class DirtyRectRenderer(Renderer):
+    """只重绘并提交发生变化的区域，适合低配机器。
+
+    每帧把场景项(外观+位置+健康条)与上一帧比较，消失或新出现的项所在区域即为脏矩形：
+    先从背景图层恢复这些区域，再在裁剪范围内按原顺序重画与之相交的实体，
+    最后用 pygame.display.update(rects) 只提交这些区域。菜单、暂停与结束画面
+    及其切换时退回整屏绘制。
+    """
+
+    # 脏矩形太多时整屏刷新更划算
+    MAX_DIRTY_RECTS = 64
+
+    def __init__(self):
+        super().__init__()
+        self.prev_mode = None
+        self.prev_items = {}
+        self.prev_hud = None
+        self.prev_panel = None
+
+    def draw(self, surface, game):
+        mode = screen_mode(game)
+        background_key = self.background_key
+        camera = getattr(game, 'camera', None)
+        background = self.get_background(surface.get_size(), game.board, camera)
+        if mode != 'play' or self.prev_mode != 'play' or background_key != self.background_key:
+            self.prev_mode = mode
+            super().draw(surface, game)
+            if mode == 'play':
+                # 整屏画出的内容即下一帧比较的基准，否则旧位置不会被擦除
+                self.prev_items, self.prev_hud, self.prev_panel = self.scene_state(game, camera)
+            else:
+                self.prev_items, self.prev_hud, self.prev_panel = {}, None, None
+            return
+
+        items, hud, panel = self.scene_state(game, camera)
+        prev = self.prev_items
+        dirty = [rect for item, rect in prev.items() if item not in items]
+        dirty.extend(rect for item, rect in items.items() if item not in prev)
+        strip = pygame.Rect(0, 0, surface.get_width(), GRID_OFFSET_Y)
+        if hud != self.prev_hud or strip.collidelist(dirty) != -1:
+            # 顶部文字与按钮层压在实体之上，整条重画
+            dirty.append(strip)
+        if panel != self.prev_panel:
+            dirty.append(PROFILER_PANEL)
+        self.prev_items, self.prev_hud, self.prev_panel = items, hud, panel
+
+        if len(dirty) > self.MAX_DIRTY_RECTS:
+            super().draw(surface, game)
+            return
+
+        order = list(items)
+        rects = list(items.values())
+        for rect in dirty:
+            surface.set_clip(rect)
+            surface.blit(background, rect, rect)
+            self.sprites.draw_items(surface, [order[i] for i in rect.collidelistall(rects)])
+            if rect.colliderect(strip):
+                self.draw_ui(surface, game)
+            if rect.colliderect(PROFILER_PANEL):
+                self.draw_profiler(surface, game)
+        surface.set_clip(None)
+        pygame.display.update(dirty)
+
+    def scene_state(self, game, camera):
+        """本帧的场景项及其矩形、顶部文字状态与性能面板状态，用于与上一帧比较。"""
+        items = {item: self.sprites.rect(item[0], item[2], item[3])
+                 for item in visible_items(game, camera)}
+        hud = (game.sun_count, game.wave_count, game.max_waves, game.level, game.speed,
+               game.selected_plant, getattr(game, 'notice', None))
+        profiler = getattr(game, 'profiler', None)
+        panel = (profiler.show_overlay, profiler.version) if profiler else None
+        return items, hud, panel
@@ -0,0 +1,238 @@
+"""输入录制与回放：保存随机种子、草坪尺寸和带步数时间戳的玩家操作，重放时得到同一局。
+
+日志是紧凑的二进制格式，每条操作只占几个字节。模拟以固定步长推进，
+只要在同一步施加同样的操作，结果就完全一致，因此回放可以不绘制、全速运行。
+
+示例:
+    python 植物大战僵尸.py --record session.pvzr    # 录制
+    python 植物大战僵尸.py --replay session.pvzr    # 带画面回放，F 键快进
+    python pvz_replay.py session.pvzr              # 无界面全速回放并输出结果
+"""
+import argparse
+import struct
+import sys
+import time
+
+from pvz_core import GRID_ROWS, GRID_COLS, LEVEL_PRESETS, PLANT_TYPES, Simulation
+
+MAGIC = b'PVZR'
+VERSION = 1
+HEADER = struct.Struct('<4sBIHH')  # 标识, 版本, 种子, 行数, 列数
+
+# 操作码
+OP_LEVEL = 0    # 选择关卡 (关卡名)
+OP_SELECT = 1   # 选中植物 (植物种类)
+OP_PLACE = 2    # 种植 (植物种类, 行, 列)
+OP_COLLECT = 3  # 点击收集阳光 (世界坐标 x, y)
+OP_PAUSE = 4    # 切换暂停
+OP_RESET = 5    # 重开 (新种子, 关卡名或 None 表示回到菜单)
+OP_END = 6      # 录制结束
+
+LEVELS = tuple(LEVEL_PRESETS)
+KINDS = tuple(PLANT_TYPES)
+NONE_INDEX = 255
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+class InputLog:
+    """一局(含其中的重开)的种子、草坪尺寸与操作序列 [(步数, 操作码, 参数)]。"""
+
+    def __init__(self, seed, rows=GRID_ROWS, cols=GRID_COLS):
+        self.seed = seed
+        self.rows = rows
+        self.cols = cols
+        self.events = []
+
+    def add(self, tick, op, *args):
+        self.events.append((tick, op, args))
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.rows, self.cols))
+        for tick, op, args in self.events:
+            write_varint(out, tick)
+            out.append(op)
+            if op == OP_LEVEL:
+                out.append(LEVELS.index(args[0]))
+            elif op == OP_SELECT:
+                out.append(KINDS.index(args[0]) if args[0] else NONE_INDEX)
+            elif op == OP_PLACE:
+                kind, row, col = args
+                out.append(KINDS.index(kind))
+                write_varint(out, row)
+                write_varint(out, col)
+            elif op == OP_COLLECT:
+                write_varint(out, zigzag(int(args[0])))
+                write_varint(out, zigzag(int(args[1])))
+            elif op == OP_RESET:
+                seed, level = args
+                out += struct.pack('<I', seed)
+                out.append(LEVELS.index(level) if level else NONE_INDEX)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, rows, cols = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("不是可识别的回放文件")
+        log = cls(seed, rows, cols)
+        pos = HEADER.size
+        while pos < len(data):
+            tick, pos = read_varint(data, pos)
+            op = data[pos]
+            pos += 1
+            if op == OP_LEVEL:
+                args = (LEVELS[data[pos]],)
+                pos += 1
+            elif op == OP_SELECT:
+                args = (KINDS[data[pos]] if data[pos] != NONE_INDEX else None,)
+                pos += 1
+            elif op == OP_PLACE:
+                kind = KINDS[data[pos]]
+                row, pos = read_varint(data, pos + 1)
+                col, pos = read_varint(data, pos)
+                args = (kind, row, col)
+            elif op == OP_COLLECT:
+                x, pos = read_varint(data, pos)
+                y, pos = read_varint(data, pos)
+                args = (unzigzag(x), unzigzag(y))
+            elif op == OP_RESET:
+                (new_seed,) = struct.unpack_from('<I', data, pos)
+                level = LEVELS[data[pos + 4]] if data[pos + 4] != NONE_INDEX else None
+                args = (new_seed, level)
+                pos += 5
+            else:
+                args = ()
+            log.events.append((tick, op, args))
+        return log
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def apply_input(game, op, *args):
+    """对 game 施加一条操作；游戏界面与无界面回放共用这一份逻辑。"""
+    if op == OP_LEVEL:
+        game.start_level(args[0])
+        game.show_menu = False
+    elif op == OP_SELECT:
+        game.selected_plant = args[0]
+    elif op == OP_PLACE:
+        game.place_plant(*args)
+        game.selected_plant = None
+    elif op == OP_COLLECT:
+        game.collect_suns(*args)
+    elif op == OP_PAUSE:
+        game.paused = not game.paused
+    elif op == OP_RESET:
+        seed, level = args
+        game.reset(seed)
+        if level:
+            game.start_level(level)
+            game.show_menu = False
+
+
+def stalled(game):
+    """菜单、暂停或对局结束时模拟不再推进。"""
+    return game.show_menu or game.paused or game.game_over or game.game_win
+
+
+class ReplayPlayer:
+    """按日志中的步数把操作重新施加到 game 上。"""
+
+    def __init__(self, game, log):
+        self.game = game
+        self.events = log.events
+        self.pos = 0
+
+    @property
+    def done(self):
+        return self.pos >= len(self.events)
+
+    def step(self, max_ticks=None):
+        """推进至多 max_ticks 步(None 表示不限)，到点的操作随即施加；返回是否还有剩余操作。"""
+        game = self.game
+        budget = max_ticks
+        while self.pos < len(self.events):
+            tick, op, args = self.events[self.pos]
+            if game.clock.ticks < tick and not stalled(game):
+                if budget == 0:
+                    return True
+                Simulation.update(game)
+                if budget is not None:
+                    budget -= 1
+                continue
+            self.pos += 1
+            if op != OP_END:
+                apply_input(game, op, *args)
+        return False
+
+
+class ReplayGame(Simulation):
+    """无界面回放用的对局，带有与游戏界面相同的菜单、暂停与选中植物状态。"""
+
+    def __init__(self, seed=None, rows=GRID_ROWS, cols=GRID_COLS):
+        super().__init__(seed, rows=rows, cols=cols)
+        self.show_menu = True
+        self.paused = False
+        self.selected_plant = None
+
+    def reset(self, seed):
+        self.__init__(seed, self.board.rows, self.board.cols)
+
+
+def replay_headless(log):
+    """不绘制、全速回放整段日志，返回最后的对局。"""
+    game = ReplayGame(log.seed, log.rows, log.cols)
+    ReplayPlayer(game, log).step()
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description='植物大战僵尸无界面回放')
+    parser.add_argument('path', help='录制得到的回放文件')
+    args = parser.parse_args()
+
+    log = InputLog.load(args.path)
+    start = time.perf_counter()
+    game = replay_headless(log)
+    elapsed = time.perf_counter() - start
+    result = '失败' if game.game_over else ('胜利' if game.game_win else '未结束')
+    print(f"{len(log.events)} 条操作，回放用时 {elapsed:.3f}s")
+    print(f"关卡 {game.level}  结果 {result}  游戏时间 {game.clock.now:.1f}s  "
+          f"波数 {game.wave_count}/{game.max_waves}  阳光 {game.sun_count}  "
+          f"植物 {len(game.plants)}  僵尸 {len(game.zombies)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""对局快照：把整局状态存成只含元组和数字的紧凑结构，并能原地恢复。
+
+快照覆盖植物(含冷却与产阳光计时)、僵尸(含攻击目标)、子弹、阳光、小推车、
+波次计数、随机数状态与模拟时钟；恢复时重建各实体容器，不调用 __init__。
+SnapshotRing 以关键帧加增量的方式保存最近若干个快照，用于倒带；
+save_snapshot/load_snapshot 把快照以 JSON 压缩写入文件，用于存档续玩；
+存档只含数据，读取别人分享的存档不会执行其中的内容。
+"""
+import json
+import zlib
+from collections import deque
+
+from pvz_core import (
+    HANDLE_SLOT_MASK, PLANT_TYPES, entity_slots, Sunflower, Peashooter, WallNut, Bullet, Sun, Zombie, FastZombie, TankZombie,
+)
+
+MAGIC = b'PVZS'
+VERSION = 2  # 1 为 pickle 格式，已不再读取
+
+# 目标植物已被吃掉时僵尸仍持有失效的句柄，快照中记为 -1，恢复为一个查不到的句柄
+STALE_TARGET = -1
+STALE_HANDLE = HANDLE_SLOT_MASK
+
+# 可出现在快照中的实体类：类名 -> 类
+ENTITY_CLASSES = {cls.__name__: cls for cls in (
+    Sunflower, Peashooter, WallNut, Bullet, Sun, Zombie, FastZombie, TankZombie)}
+# 句柄、下标与所属容器由容器在恢复时重新分配
+SKIPPED_SLOTS = ('handle', 'index', 'owner')
+SIM_FIELDS = (
+    'seed', 'sun_count', 'sun_collected', 'sun_spent', 'game_over', 'game_win',
+    'wave_count', 'max_waves', 'last_sun_generation', 'last_zombie_generation',
+    'zombie_interval', 'level',
+)
+# 游戏界面特有的状态，没有这些属性的对局(如纯模拟)跳过
+UI_FIELDS = ('show_menu', 'paused', 'selected_plant')
+# 按实体逐条比较做增量的部分
+ENTITY_SECTIONS = ('plants', 'zombies', 'bullets', 'suns')
+
+_slot_names = {}
+
+
+def slot_names(cls):
+    """类及其父类声明的全部槽位，去掉句柄与下标。"""
+    names = _slot_names.get(cls)
+    if names is None:
+        names = tuple(name for name in entity_slots(cls) if name not in SKIPPED_SLOTS)
+        _slot_names[cls] = names
+    return names
+
+
+def pack(entity):
+    cls = type(entity)
+    return (cls.__name__,) + tuple(getattr(entity, name) for name in slot_names(cls))
+
+
+def unpack(entry):
+    cls = ENTITY_CLASSES[entry[0]]
+    entity = cls.__new__(cls)
+    for name, value in zip(slot_names(cls), entry[1:]):
+        setattr(entity, name, value)
+    return entity
+
+
+def capture(game):
+    """返回 game 当前状态的快照 {部分名: 元组}。"""
+    plants = list(game.plants)
+    plant_index = {plant.handle: i for i, plant in enumerate(plants)}
+    zombies = list(game.zombies)
+    target_slot = slot_names(Zombie).index('target') + 1
+    packed_zombies = []
+    for zombie in zombies:
+        entry = pack(zombie)
+        # 攻击目标改存为植物在快照中的序号
+        if zombie.target is not None:
+            target = plant_index.get(zombie.target, STALE_TARGET)
+            entry = entry[:target_slot] + (target,) + entry[target_slot + 1:]
+        packed_zombies.append(entry)
+    snap = {
+        'board': (game.board.rows, game.board.cols),
+        'tick': game.clock.ticks,
+        'sim': tuple(getattr(game, name) for name in SIM_FIELDS),
+        'ui': tuple(getattr(game, name, None) for name in UI_FIELDS),
+        'rng': game.rng.getstate(),
+        # 植物配置只存名称与花费，类由种类名在 PLANT_TYPES 中查回
+        'config': (tuple((kind, info['name'], info['cost']) for kind, info in game.plant_types.items()),
+                   tuple(sorted(game.health_overrides.items()))),
+        'plants': tuple(pack(p) for p in plants),
+        'zombies': tuple(packed_zombies),
+        'bullets': tuple(pack(b) for b in game.bullets),
+        'suns': tuple(pack(s) for s in game.suns),
+        'mowers': tuple((m.x, m.active, m.triggered) for m in game.lawn_mowers),
+    }
+    lanes = getattr(game.lanes, 'lanes', None)
+    if lanes is not None:
+        # 同一 x 上的僵尸在行内的先后决定谁先中弹，按原顺序保存
+        zombie_index = {id(z): i for i, z in enumerate(zombies)}
+        snap['lanes'] = tuple(tuple(zombie_index[id(z)] for z in lane) for lane in lanes)
+    return snap
+
+
+def restore(game, snap):
+    """把 game 原地恢复为快照时的状态；草坪尺寸必须相同。"""
+    if snap['board'] != (game.board.rows, game.board.cols):
+        raise ValueError(f"快照的草坪尺寸 {snap['board']} 与当前对局不同")
+    for name, value in zip(SIM_FIELDS, snap['sim']):
+        setattr(game, name, value)
+    for name, value in zip(UI_FIELDS, snap['ui']):
+        if hasattr(game, name):
+            setattr(game, name, value)
+    game.clock.ticks = snap['tick']
+    game.rng.setstate(snap['rng'])
+    plant_types, overrides = snap['config']
+    game.plant_types = {kind: dict(PLANT_TYPES[kind], name=name, cost=cost)
+                        for kind, name, cost in plant_types}
+    game.health_overrides = dict(overrides)
+    game.clear_entities()
+
+    plants = [unpack(entry) for entry in snap['plants']]
+    for plant in plants:
+        game.add_plant(plant)
+    zombies = []
+    for entry in snap['zombies']:
+        zombie = unpack(entry)
+        if zombie.target == STALE_TARGET:
+            zombie.target = STALE_HANDLE
+        elif zombie.target is not None:
+            zombie.target = plants[zombie.target].handle
+        zombies.append(zombie)
+    order = snap.get('lanes')
+    if order is None:
+        for zombie in zombies:
+            game.insert_zombie(zombie)
+    else:
+        for zombie in zombies:
+            game.zombies.append(zombie)
+        for row, indices in enumerate(order):
+            game.lanes.lanes[row] = [zombies[i] for i in indices]
+            game.lanes.xs[row] = [zombies[i].x for i in indices]
+    for entry in snap['bullets']:
+        game.bullets.append(unpack(entry))
+    for entry in snap['suns']:
+        game.add_sun(unpack(entry))
+    for mower, (x, active, triggered) in zip(game.lawn_mowers, snap['mowers']):
+        mower.x, mower.active, mower.triggered = x, active, triggered
+
+
+def diff(base, snap):
+    """snap 相对关键帧 base 的增量：未变的部分省略，实体部分只记变化的条目。"""
+    delta = {}
+    for name, value in snap.items():
+        old = base.get(name)
+        if value == old:
+            continue
+        if name == 'rng' and old[1][:-1] == value[1][:-1]:
+            # 梅森旋转每取 624 个数才重算一次内部状态，其间只有读取位置在变
+            delta[name] = ('pos', value[1][-1], value[2])
+            continue
+        if name in ENTITY_SECTIONS and old is not None:
+            changed = tuple((i, v) for i, v in enumerate(value) if i >= len(old) or old[i] != v)
+            if len(changed) * 2 < len(value):
+                delta[name] = ('patch', len(value), changed)
+                continue
+        delta[name] = ('full', value)
+    return delta
+
+
+def apply_delta(base, delta):
+    snap = dict(base)
+    for name, change in delta.items():
+        if change[0] == 'full':
+            snap[name] = change[1]
+        elif change[0] == 'pos':
+            version, state, _ = base[name]
+            snap[name] = (version, state[:-1] + (change[1],), change[2])
+        else:
+            _, length, changed = change
+            entries = list(base[name][:length])
+            entries.extend(None for _ in range(length - len(entries)))
+            for i, entry in changed:
+                entries[i] = entry
+            snap[name] = tuple(entries)
+    return snap
+
+
+class SnapshotRing:
+    """最近 capacity 个快照；每隔 keyframe_every 个存一个完整关键帧，其余只存相对它的增量。
+
+    最旧的关键帧被挤出后，仍引用它的增量会让它多留一会儿，总内存依然有界。
+    """
+
+    def __init__(self, capacity=120, keyframe_every=10):
+        self.entries = deque(maxlen=capacity)  # (步数, 关键帧, 增量或 None)
+        self.keyframe_every = keyframe_every
+        self.since_keyframe = 0
+        self.keyframe = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.keyframe = None
+
+    def push(self, snap):
+        if self.keyframe is None or self.since_keyframe >= self.keyframe_every:
+            self.keyframe = snap
+            self.since_keyframe = 0
+            self.entries.append((snap['tick'], snap, None))
+        else:
+            self.since_keyframe += 1
+            self.entries.append((snap['tick'], self.keyframe, diff(self.keyframe, snap)))
+
+    def get(self, i):
+        """第 i 个快照，负数从最新的往前数。"""
+        _, keyframe, delta = self.entries[i]
+        return keyframe if delta is None else apply_delta(keyframe, delta)
+
+    def rewind(self, steps=1):
+        """丢弃最新的 steps 个快照之后的记录，返回此时最新的快照；没有记录时返回 None。"""
+        if not self.entries:
+            return None
+        keep = max(1, len(self.entries) - steps)
+        while len(self.entries) > keep:
+            self.entries.pop()
+        _, keyframe, delta = self.entries[-1]
+        # 之后的快照继续相对这个关键帧做增量
+        self.keyframe = keyframe
+        self.since_keyframe = sum(1 for _, k, _ in self.entries if k is keyframe) - 1
+        return self.get(-1)
+
+    def latest_tick(self):
+        return self.entries[-1][0] if self.entries else None
+
+
+def as_tuples(value):
+    """JSON 把元组读成列表，换回元组，使读出的快照与 capture 的结果相同。"""
+    if isinstance(value, list):
+        return tuple(as_tuples(v) for v in value)
+    return value
+
+
+def to_bytes(snap):
+    text = json.dumps(snap, ensure_ascii=False, separators=(',', ':'))
+    return MAGIC + bytes([VERSION]) + zlib.compress(text.encode('utf-8'))
+
+
+def from_bytes(data):
+    """解出存档内容；文件头不符、截断或损坏时一律抛出 ValueError。"""
+    if len(data) < 5 or data[:4] != MAGIC or data[4] != VERSION:
+        raise ValueError("不是可识别的存档文件")
+    try:
+        snap = json.loads(zlib.decompress(data[5:]).decode('utf-8'))
+    except (zlib.error, ValueError) as e:
+        raise ValueError(f"存档已损坏: {e}") from e
+    if not isinstance(snap, dict):
+        raise ValueError("存档已损坏")
+    return {name: as_tuples(value) for name, value in snap.items()}
+
+
+def save_snapshot(path, snap):
+    with open(path, 'wb') as f:
+        f.write(to_bytes(snap))
+
+
+def load_snapshot(path):
+    with open(path, 'rb') as f:
+        return from_bytes(f.read())
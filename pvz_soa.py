@@ -0,0 +1,457 @@
+"""可选的 NumPy 列式实体存储：僵尸与子弹按列打包，每一步用向量化运算推进。
+
+需要安装 numpy；核心模拟 pvz_core 本身不依赖它。ArraySimulation 与 Simulation
+使用同一套规则和随机数序列，相同种子与操作下逐步结果完全一致。
+
+同样大小草坪的多局对局可以共用一个 ArrayBatch：各局的僵尸与子弹存放在同一组列中，
+以 game 列区分。ArrayBatch.update 逐局处理阳光、出怪与植物之后，一次向量化推进
+全部对局的子弹、僵尸与小推车；单独使用的 ArraySimulation 自带一个只有一局的 ArrayBatch。
+"""
+import numpy as np
+
+from pvz_core import (
+    GRID_ROWS, GRID_COLS, GRID_SIZE, GRID_OFFSET_X, GRID_OFFSET_Y, HANDLE_SLOT_MASK,
+    Board, Plant, Bullet, Zombie, FastZombie, TankZombie, Simulation,
+)
+
+# 僵尸种类编号即在此元组中的下标
+ZOMBIE_KINDS = (Zombie, FastZombie, TankZombie)
+
+class ColumnStore:
+    """按列存放同类实体；容量不足时翻倍，删除时按原顺序压缩。"""
+
+    fields = ()
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in self.fields}
+
+    def __len__(self):
+        return self.n
+
+    def col(self, name):
+        """返回某列有效部分的视图，原地修改会写回存储。"""
+        return self.columns[name][:self.n]
+
+    def push(self, **values):
+        if self.n == self.capacity:
+            self.capacity *= 2
+            for name, column in self.columns.items():
+                grown = np.zeros(self.capacity, column.dtype)
+                grown[:self.n] = column[:self.n]
+                self.columns[name] = grown
+        for name, value in values.items():
+            self.columns[name][self.n] = value
+        self.n += 1
+
+    def keep(self, mask):
+        """只保留 mask 为真的实体。"""
+        k = int(np.count_nonzero(mask))
+        if k == self.n:
+            return
+        for column in self.columns.values():
+            column[:k] = column[:self.n][mask]
+        self.n = k
+
+
+class ZombieStore(ColumnStore):
+    fields = (
+        ('x', np.float64), ('row', np.int64), ('health', np.float64), ('max_health', np.float64),
+        ('speed', np.float64), ('attack', np.float64), ('kind', np.int64),
+        ('attacking', np.bool_), ('target', np.int64), ('game', np.int64),
+    )
+
+    def add(self, zombie, target=-1, game=0):
+        self.push(x=zombie.x, row=zombie.row, health=zombie.health, max_health=zombie.max_health,
+                  speed=zombie.speed,
+                  attack=zombie.attack_power, kind=ZOMBIE_KINDS.index(type(zombie)),
+                  attacking=zombie.attacking, target=target, game=game)
+
+    def zombie(self, i, plant_table):
+        """第 i 个僵尸的只读对象快照；攻击目标编号按 plant_table 换回句柄。"""
+        cls = ZOMBIE_KINDS[self.columns['kind'][i]]
+        z = cls.__new__(cls)
+        z.row = int(self.columns['row'][i])
+        z.x = float(self.columns['x'][i])
+        z.y = GRID_OFFSET_Y + z.row * GRID_SIZE
+        z.speed = float(self.columns['speed'][i])
+        z.health = float(self.columns['health'][i])
+        z.max_health = float(self.columns['max_health'][i])
+        z.attack_power = float(self.columns['attack'][i])
+        z.attacking = bool(self.columns['attacking'][i])
+        target = self.columns['target'][i]
+        z.target = plant_table[target].handle if target >= 0 else None
+        z.active = True
+        return z
+
+
+class BulletStore(ColumnStore):
+    fields = (
+        ('x', np.float64), ('y', np.float64), ('row', np.int64),
+        ('damage', np.float64), ('speed', np.float64), ('game', np.int64),
+    )
+
+    def add(self, bullet, game=0):
+        self.push(x=bullet.x, y=bullet.y, row=bullet.row, damage=bullet.damage, speed=bullet.speed,
+                  game=game)
+
+    def bullet(self, i):
+        b = Bullet.__new__(Bullet)
+        b.x = float(self.columns['x'][i])
+        b.y = float(self.columns['y'][i])
+        b.row = int(self.columns['row'][i])
+        b.damage = float(self.columns['damage'][i])
+        b.speed = float(self.columns['speed'][i])
+        b.active = True
+        return b
+
+
+class GameZombies:
+    """一局的僵尸：共享 ZombieStore 中属于这一局的那些，按加入顺序排列。"""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.store = sim.batch.zombies
+
+    def __len__(self):
+        return int(self.sim.lanes.counts.sum())
+
+    def indices(self):
+        return np.flatnonzero(self.store.col('game') == self.sim.slot)
+
+    def col(self, name):
+        """本局某列的副本。"""
+        return self.store.col(name)[self.store.col('game') == self.sim.slot]
+
+    def __iter__(self):
+        """逐个生成僵尸对象的只读快照，供绘制等逐对象代码使用。"""
+        for i in self.indices():
+            yield self.store.zombie(i, self.sim.plant_table)
+
+
+class GameBullets:
+    """一局的子弹，同 GameZombies。"""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.store = sim.batch.bullets
+
+    def __len__(self):
+        return int(np.count_nonzero(self.store.col('game') == self.sim.slot))
+
+    def append(self, bullet):
+        """与 list.append 相同的接口，豌豆射手可直接向其中发射子弹。"""
+        self.store.add(bullet, self.sim.slot)
+        # 数据已拷入列中，子弹对象立即回收
+        self.sim.bullet_pool.release(bullet)
+
+    def __iter__(self):
+        for i in np.flatnonzero(self.store.col('game') == self.sim.slot):
+            yield self.store.bullet(i)
+
+    def in_rows(self, rows):
+        """与 RowStore.in_rows 相同：给定各行的子弹，按加入顺序排列。"""
+        store = self.store
+        mask = (store.col('game') == self.sim.slot) & np.isin(store.col('row'), list(rows))
+        return [store.bullet(i) for i in np.flatnonzero(mask)]
+
+
+class LaneCounts:
+    """一局每行的僵尸数量，是 ArrayBatch.counts 中这一局那一行的视图。"""
+
+    def __init__(self, counts):
+        self.counts = counts
+
+    def count(self, row):
+        return self.counts[row]
+
+
+class ArrayBatch:
+    """n 局同样大小草坪的对局共用的僵尸与子弹列式存储。
+
+    第 g 局第 r 行记为第 g * rows + r 道；子弹命中、僵尸行走与啃食、小推车都按道向量化，
+    一次处理所有正在推进的对局。各局的 ArraySimulation 以 slot 指明自己是第几局。
+    """
+
+    def __init__(self, n, rows=GRID_ROWS, cols=GRID_COLS):
+        self.n = n
+        self.rows = rows
+        self.cols = cols
+        self.width = Board(rows, cols).width
+        self.games = [None] * n
+        self.zombies = ZombieStore()
+        self.bullets = BulletStore()
+        # 各局每行的僵尸数：加入时累加，每步推进完小推车后重新统计
+        self.counts = np.zeros((n, rows), np.int64)
+        # 各格植物在所属对局 plant_table 中的编号，-1 为空格；
+        # 第 c + 1 列对应草坪第 c 列，第 0 列是草坪左侧之外的哨兵
+        self.cells = np.full((n * rows, cols + 1), -1, np.int64)
+        self.cell_x = GRID_OFFSET_X + (np.arange(cols + 1) - 1) * GRID_SIZE
+
+    def lanes(self, store):
+        return store.col('game') * self.rows + store.col('row')
+
+    def only(self, slot):
+        """只推进第 slot 局时的掩码。"""
+        stepping = np.zeros(self.n, np.bool_)
+        stepping[slot] = True
+        return stepping
+
+    def clear_game(self, slot):
+        """移除第 slot 局的全部僵尸、子弹与植物格，供该局重开或读档。"""
+        for store in (self.zombies, self.bullets):
+            if store.n:
+                store.keep(store.col('game') != slot)
+        self.counts[slot] = 0
+        self.cells[slot * self.rows:(slot + 1) * self.rows] = -1
+
+    def set_cell(self, slot, plant, pid):
+        self.cells[slot * self.rows + plant.row, plant.col + 1] = pid
+
+    def count_lanes(self):
+        self.counts[:] = np.bincount(self.lanes(self.zombies),
+                                     minlength=self.n * self.rows).reshape(self.n, self.rows)
+
+    def mowers(self):
+        """按道排列的全部小推车。"""
+        return [mower for game in self.games for mower in game.lawn_mowers]
+
+    def update(self):
+        """推进全部未结束的对局一步，结果与逐局调用 ArraySimulation.update 相同。"""
+        games = [game for game in self.games if not (game.game_over or game.game_win)]
+        if not games:
+            return
+        stepping = np.zeros(self.n, np.bool_)
+        for game in games:
+            if game.step_ticks != 1:
+                raise ValueError("ArraySimulation 只支持 step_ticks=1")
+            game.begin_step()
+            stepping[game.slot] = True
+        self.update_bullets(stepping)
+        self.update_zombies(stepping)
+        self.update_mowers(stepping)
+        for game in games:
+            game.end_step()
+
+    def update_bullets(self, stepping):
+        """推进 stepping 为真的各局的子弹并结算命中。"""
+        bullets, zombies = self.bullets, self.zombies
+        if not bullets.n:
+            return
+        moving = stepping[bullets.col('game')]
+        bx = bullets.col('x')
+        # 未推进的对局加 0，位置不变
+        bx += bullets.col('speed') * moving
+        alive = bx <= self.width
+        hit = np.full(bullets.n, -1, np.int64)
+
+        query = np.flatnonzero(alive & moving)
+        if zombies.n and query.size:
+            # 僵尸按道、道内按 x 排序；排序稳定，x 相同时先出现的僵尸在前
+            zx, zl = zombies.col('x'), self.lanes(zombies)
+            order = np.lexsort((zx, zl))
+            sorted_x, sorted_l = zx[order], zl[order]
+            z = order.size
+            # 命中条件 zombie.x - 30 <= bullet.x <= zombie.x + 10：取同一道中窗口内最靠左的僵尸。
+            # 把查询点 bullet.x - 10 与僵尸一起按 (道, x) 排序，x 相同时查询点在前，
+            # 排在查询点之前的僵尸个数即所求僵尸在 sorted 中的位置
+            ql = self.lanes(bullets)[query]
+            merged = np.lexsort((
+                np.concatenate((np.ones(z, np.int8), np.zeros(query.size, np.int8))),
+                np.concatenate((sorted_x, bx[query] - 10)),
+                np.concatenate((sorted_l, ql)),
+            ))
+            is_query = merged >= z
+            k = np.empty(query.size, np.int64)
+            k[merged[is_query] - z] = np.cumsum(~is_query)[is_query]
+            inside = k < z
+            kk = np.minimum(k, z - 1)
+            inside &= (sorted_l[kk] == ql) & (sorted_x[kk] <= bx[query] + 30)
+            hit[query[inside]] = order[k[inside]]
+
+        hits = hit >= 0
+        # subtract.at 按子弹顺序依次扣血
+        np.subtract.at(zombies.col('health'), hit[hits], bullets.col('damage')[hits])
+        bullets.keep(alive & ~hits)
+
+    def update_zombies(self, stepping):
+        """推进 stepping 为真的各局的僵尸：啃食、行走、接触植物与到达最左端。"""
+        zombies = self.zombies
+        n = zombies.n
+        if not n:
+            return
+        x, game = zombies.col('x'), zombies.col('game')
+        lane = self.lanes(zombies)
+        attacking, target = zombies.col('attacking'), zombies.col('target')
+        active = stepping[game]
+        movers = active & ~(attacking & (target >= 0))
+        new_x = np.where(movers, x - zombies.col('speed'), x)
+
+        # 各局中到达最左端且本行小推车已用完的第一个僵尸使该局结束，
+        # 与逐个更新时一样，该局排在它之后的僵尸本步不再更新
+        mowers = self.mowers()
+        mower_active = np.fromiter((m.active for m in mowers), np.bool_, len(mowers))
+        reached = active & (new_x <= GRID_OFFSET_X)
+        fatal = np.flatnonzero(reached & ~mower_active[lane])
+        live = active
+        if fatal.size:
+            first = np.full(self.n, n, np.int64)
+            np.minimum.at(first, game[fatal], fatal)
+            live = active & (np.arange(n) <= first[game])
+
+        # 攻击：按原顺序逐个扣血，浮点结果与逐对象相减一致
+        killed = {}  # (道, 列 + 1) -> 本步吃掉该格植物的僵尸下标
+        idx = np.flatnonzero(live & ~movers)
+        if idx.size:
+            games = self.games
+            for i, g, pid, power in zip(idx.tolist(), game[idx].tolist(), target[idx].tolist(),
+                                        zombies.col('attack')[idx].tolist()):
+                sim = games[g]
+                plant = sim.plant_table[pid]
+                if plant in sim.grid:
+                    plant.health -= power
+                    if plant.health > 0:
+                        continue
+                    sim.grid.remove(plant)
+                    killed[(g * self.rows + plant.row, plant.col + 1)] = i
+                # 目标已被吃掉(或恢复时句柄已失效)：与逐对象更新一样，本步停止攻击且不移动
+                attacking[i] = False
+                target[i] = -1
+
+        # 移动并检测接触：候选只有所在格及其左侧一格，两者都满足时取所在格的植物
+        idx = np.flatnonzero(movers & live)
+        x[idx] = new_x[idx]
+        if idx.size:
+            cells = self.cells
+            if killed:
+                # 被排在前面的僵尸本步吃掉的植物对排在后面的僵尸已不存在
+                cell_killer = np.full(cells.shape, n, np.int64)
+                for cell, i in killed.items():
+                    cell_killer[cell] = i
+            zx, zl = x[idx], lane[idx]
+            col0 = np.floor((zx - GRID_OFFSET_X) / GRID_SIZE).astype(np.int64)
+            best_pid = np.full(idx.size, -1, np.int64)
+            for dc in (-1, 0):
+                c = np.clip(col0 + dc + 1, 0, self.cols)
+                pid = cells[zl, c]
+                px = self.cell_x[c]
+                ok = (pid >= 0) & (zx - (px + GRID_SIZE) < 10) & (zx > px)
+                if killed:
+                    ok &= cell_killer[zl, c] > idx
+                best_pid = np.where(ok, pid, best_pid)
+            contact = best_pid >= 0
+            attacking[idx[contact]] = True
+            target[idx[contact]] = best_pid[contact]
+        for cell in killed:
+            self.cells[cell] = -1
+
+        # 到达最左端：启动本行小推车
+        for l in np.unique(lane[reached & live & mower_active[lane]]).tolist():
+            mowers[l].triggered = True
+        for g in np.unique(game[fatal]).tolist():
+            self.games[g].game_over = True
+
+        # 清理死亡僵尸(已到达最左端的僵尸留给小推车处理)
+        zombies.keep(~(live & (zombies.col('health') <= 0) & ~reached))
+
+    def update_mowers(self, stepping):
+        """触发并推进 stepping 为真的各局的小推车，之后重新统计各行僵尸数。"""
+        zombies = self.zombies
+        mowers = self.mowers()
+        lane_on = np.repeat(stepping, self.rows)
+        if zombies.n:
+            # 本行有僵尸接近最左端时启动小推车
+            x, lane = zombies.col('x'), self.lanes(zombies)
+            for l in np.unique(lane[(x <= GRID_OFFSET_X + 15) & lane_on[lane]]).tolist():
+                if mowers[l].active:
+                    mowers[l].triggered = True
+        crushed = None
+        for l, mower in enumerate(mowers):
+            if not (mower.triggered and mower.active and lane_on[l]):
+                continue
+            mower.x += mower.speed
+            if zombies.n:
+                x, lane = zombies.col('x'), self.lanes(zombies)
+                hit = (lane == l) & (x >= mower.x) & (x <= mower.x + mower.width + 20)
+                crushed = hit if crushed is None else crushed | hit
+            # 移出世界右边界后失效
+            if mower.x > mower.max_x + 20:
+                mower.active = False
+        if crushed is not None:
+            zombies.keep(~crushed)
+        self.count_lanes()
+
+
+class ArraySimulation(Simulation):
+    """僵尸与子弹使用列式存储的 Simulation，移动、命中、死亡清理均为向量化运算。
+
+    batch 为 None 时自带一个只有一局的 ArrayBatch；给出时作为其中的第 slot 局，
+    可由 ArrayBatch.update 与其余各局一起推进。
+    """
+
+    def __init__(self, seed=None, clock=None, rows=GRID_ROWS, cols=GRID_COLS, batch=None, slot=0):
+        if batch is None:
+            batch = ArrayBatch(1, rows, cols)
+        elif (batch.rows, batch.cols) != (rows, cols):
+            raise ValueError(f"草坪尺寸 {(rows, cols)} 与 ArrayBatch 的 {(batch.rows, batch.cols)} 不同")
+        self.batch = batch
+        self.slot = slot
+        batch.games[slot] = self
+        super().__init__(seed, clock, rows, cols)
+
+    def clear_entities(self):
+        super().clear_entities()
+        # 僵尸的攻击目标以编号保存，编号即植物在此表中的下标
+        self.plant_table = []
+        self._plant_ids = {}
+        # 恢复快照时攻击目标句柄已失效的僵尸指向这株不在网格中的植物
+        self.stale_plant = Plant(0, 0)
+        self.stale_plant.handle = HANDLE_SLOT_MASK
+        self.batch.clear_game(self.slot)
+        self.zombies = GameZombies(self)
+        self.bullets = GameBullets(self)
+        self.lanes = LaneCounts(self.batch.counts[self.slot])
+
+    def plant_id(self, plant):
+        pid = self._plant_ids.get(id(plant))
+        if pid is None:
+            pid = self._plant_ids[id(plant)] = len(self.plant_table)
+            self.plant_table.append(plant)
+        return pid
+
+    def add_plant(self, plant):
+        super().add_plant(plant)
+        self.batch.set_cell(self.slot, plant, self.plant_id(plant))
+
+    def insert_zombie(self, zombie):
+        if zombie.target is None:
+            target = -1
+        else:
+            plant = self.grid.plants.get(zombie.target)
+            target = self.plant_id(plant if plant is not None else self.stale_plant)
+        self.batch.zombies.add(zombie, target, self.slot)
+        self.lanes.counts[zombie.row] += 1
+
+    def update(self):
+        # 向量化的子弹与小推车判定没有实现粗步长扫掠
+        if self.step_ticks != 1:
+            raise ValueError("ArraySimulation 只支持 step_ticks=1")
+        super().update()
+
+    def fork(self, seed=None):
+        raise TypeError("ArraySimulation 不支持分叉")
+
+    def compact(self):
+        # 列式存储删除时已即时压缩
+        self.grid.compact()
+        self.suns.compact()
+
+    def update_bullets(self):
+        self.batch.update_bullets(self.batch.only(self.slot))
+
+    def update_zombies(self):
+        self.batch.update_zombies(self.batch.only(self.slot))
+
+    def update_mowers(self):
+        self.batch.update_mowers(self.batch.only(self.slot))
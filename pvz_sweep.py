@@ -0,0 +1,266 @@
+"""平衡性批量测试：在多进程池中无界面地跑大量对局，按参数网格和种子统计胜率、
+失败时间与阳光收支。每个参数组合的结果以配置哈希为键缓存在磁盘上，
+重复运行时只重新计算发生变化的组合。
+
+示例:
+    python pvz_sweep.py --levels easy normal hard --seeds 200 \\
+        --grid max_waves=4,5,7 --grid cost.peashooter=75,100 --grid hp.WallNut=300,400
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+from multiprocessing import Pool
+
+from pvz_core import LEVEL_PRESETS, TICK_RATE, Simulation
+
+# 规则或策略改变时递增，使旧缓存失效
+CACHE_VERSION = 3
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sweep_cache")
+DECISION_INTERVAL = TICK_RATE // 2  # 策略每隔多少步行动一次
+DEFAULT_MAX_TICKS = 20 * 60 * TICK_RATE  # 单局上限：20分钟游戏时间
+
+
+def strategy_idle(sim, tick, config):
+    """只收集阳光，不种植物，作为基准。"""
+    sim.collect_all_suns()
+
+
+def strategy_greedy(sim, tick, config):
+    """第一列种满向日葵，之后优先给僵尸最多的行补豌豆射手，前线用坚果墙顶住。"""
+    sim.collect_all_suns()
+    rows, cols = sim.board.rows, sim.board.cols
+    for row in range(rows):
+        if not sim.is_occupied(row, 0):
+            sim.place_plant("sunflower", row, 0)
+            return
+    rows = sorted(range(rows), key=lambda r: -sim.lanes.count(r))
+    for row in rows:
+        for col in range(1, cols - 3):
+            if not sim.is_occupied(row, col):
+                sim.place_plant("peashooter", row, col)
+                return
+    for row in rows:
+        if sim.lanes.count(row) and not sim.is_occupied(row, cols - 3):
+            sim.place_plant("wallnut", row, cols - 3)
+            return
+
+
+def strategy_script(sim, tick, config):
+    """按配置中的 script 列表 [[步数, 植物, 行, 列], ...] 种植。"""
+    sim.collect_all_suns()
+    for at, kind, row, col in config.get("script", ()):
+        if at <= tick < at + DECISION_INTERVAL:
+            sim.place_plant(kind, row, col)
+
+
+STRATEGIES = {
+    "idle": strategy_idle,
+    "greedy": strategy_greedy,
+    "script": strategy_script,
+}
+
+
+def make_simulation(config, seed, batch=None, slot=0):
+    """按配置建立一局模拟；params 支持 max_waves、zombie_interval、cost.<植物>、hp.<类名>。
+
+    batch 与 slot 只用于 soa 后端，把这一局放进共用的 ArrayBatch 的第 slot 局。
+    """
+    if config.get("backend") == "soa":
+        if config.get("step_ticks", 1) != 1:
+            raise ValueError("soa 后端只支持 step_ticks=1")
+        from pvz_soa import ArraySimulation
+        sim = ArraySimulation(seed, batch=batch, slot=slot)
+    else:
+        sim = Simulation(seed)
+    sim.step_ticks = config.get("step_ticks", 1)
+    sim.auto_collect = config.get("auto_collect", False)
+    sim.start_level(config["level"])
+    plant_types = {kind: dict(info) for kind, info in sim.plant_types.items()}
+    for name, value in config.get("params", {}).items():
+        if name in ("max_waves", "zombie_interval"):
+            setattr(sim, name, value)
+        elif name.startswith("cost."):
+            plant_types[name[5:]]["cost"] = value
+        elif name.startswith("hp."):
+            sim.health_overrides[name[3:]] = value
+        else:
+            raise ValueError(f"未知参数: {name}")
+    sim.plant_types = plant_types
+    return sim
+
+
+def play_game(job):
+    """跑完一局并返回统计结果，供进程池调用。"""
+    config, seed = job
+    sim = make_simulation(config, seed)
+    strategy = STRATEGIES[config["strategy"]]
+    max_ticks = config.get("max_ticks", DEFAULT_MAX_TICKS)
+    tick = 0
+    while tick < max_ticks and not (sim.game_over or sim.game_win):
+        # 粗步长时每跨过一个决策间隔行动一次
+        if tick % DECISION_INTERVAL < sim.step_ticks:
+            strategy(sim, tick, config)
+        sim.update()
+        tick += sim.step_ticks
+    return {"seed": seed, **game_stats(sim)}
+
+
+def game_stats(sim):
+    """一局的结果与阳光收支。"""
+    return {
+        "win": sim.game_win,
+        "loss": sim.game_over,
+        "time": sim.clock.now,
+        "waves": sim.wave_count,
+        "sun_collected": sim.sun_collected,
+        "sun_spent": sim.sun_spent,
+        "sun_left": sim.sun_count,
+    }
+
+
+def summarize(games):
+    n = len(games)
+    losses = [g["time"] for g in games if g["loss"]]
+
+    def mean(values):
+        values = list(values)
+        return sum(values) / len(values) if values else None
+
+    return {
+        "games": n,
+        "win_rate": sum(g["win"] for g in games) / n,
+        "loss_rate": len(losses) / n,
+        "mean_time_to_loss": mean(losses),
+        "mean_game_time": mean(g["time"] for g in games),
+        "mean_sun_collected": mean(g["sun_collected"] for g in games),
+        "mean_sun_spent": mean(g["sun_spent"] for g in games),
+        "mean_sun_left": mean(g["sun_left"] for g in games),
+    }
+
+
+def cell_key(config, seeds):
+    payload = json.dumps({"version": CACHE_VERSION, "config": config, "seeds": list(seeds)},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+def build_cells(levels, grid, strategy, max_ticks, backend, step_ticks=1, auto_collect=False):
+    """展开参数网格，每个组合一个配置。"""
+    names = sorted(grid)
+    cells = []
+    for level in levels:
+        for values in itertools.product(*(grid[name] for name in names)):
+            cells.append({
+                "level": level,
+                "strategy": strategy,
+                "max_ticks": max_ticks,
+                "backend": backend,
+                "params": dict(zip(names, values)),
+            })
+            # 单步推进时不写入，沿用已有的缓存
+            if step_ticks != 1:
+                cells[-1]["step_ticks"] = step_ticks
+            if auto_collect:
+                cells[-1]["auto_collect"] = True
+    return cells
+
+
+def sweep(cells, seeds, workers=None, cache_dir=DEFAULT_CACHE_DIR, script=None):
+    """对每个组合跑完所有种子，返回 [(配置, 汇总)]；命中缓存的组合直接读取。"""
+    if script is not None:
+        cells = [dict(cell, script=script) for cell in cells]
+    os.makedirs(cache_dir, exist_ok=True)
+    results = {}
+    pending = []
+    for i, cell in enumerate(cells):
+        path = os.path.join(cache_dir, cell_key(cell, seeds) + ".json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                results[i] = json.load(f)["summary"]
+        else:
+            pending.append((i, path))
+
+    if pending:
+        jobs = [(cells[i], seed) for i, _ in pending for seed in seeds]
+        chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        with Pool(workers) as pool:
+            games = pool.map(play_game, jobs, chunksize=chunksize)
+        for k, (i, path) in enumerate(pending):
+            cell_games = games[k * len(seeds):(k + 1) * len(seeds)]
+            summary = summarize(cell_games)
+            results[i] = summary
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"config": cells[i], "seeds": list(seeds), "summary": summary,
+                           "games": cell_games}, f, ensure_ascii=False)
+    return [(cells[i], results[i]) for i in range(len(cells))], len(pending)
+
+
+def parse_grid(items):
+    """把 name=v1,v2 解析为 {name: [v1, v2]}，数值自动转换。"""
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        grid[name] = [json.loads(v) for v in values.split(",")]
+    return grid
+
+
+def write_report(rows, path):
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"config": c, "summary": s} for c, s in rows], f, ensure_ascii=False, indent=2)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        params = sorted({name for c, _ in rows for name in c["params"]})
+        metrics = list(rows[0][1]) if rows else []
+        writer.writerow(["level"] + params + metrics)
+        for c, s in rows:
+            writer.writerow([c["level"]] + [c["params"].get(p) for p in params] + [s[m] for m in metrics])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="植物大战僵尸平衡性批量测试")
+    parser.add_argument("--levels", nargs="+", default=list(LEVEL_PRESETS), choices=list(LEVEL_PRESETS))
+    parser.add_argument("--seeds", type=int, default=100, help="每个组合的对局数")
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="参数网格，可重复：max_waves、zombie_interval、cost.<植物>、hp.<类名>")
+    parser.add_argument("--strategy", default="greedy", choices=list(STRATEGIES))
+    parser.add_argument("--script", help="script 策略使用的 JSON 文件：[[步数, 植物, 行, 列], ...]")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument("--backend", default="object", choices=["object", "soa"])
+    parser.add_argument("--step-ticks", type=int, default=1,
+                        help="每次推进的步数；粗步长(如 10)快得多，结果为近似值，仅支持 object 后端")
+    parser.add_argument("--auto-collect", action="store_true", help="每步自动收集全部阳光，不等策略行动")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认使用全部核心")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--out", help="把结果写入 .csv 或 .json")
+    args = parser.parse_args()
+    if args.backend == "soa" and args.step_ticks != 1:
+        parser.error("--step-ticks 仅支持 object 后端")
+
+    script = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    cells = build_cells(args.levels, parse_grid(args.grid), args.strategy, args.max_ticks, args.backend,
+                        args.step_ticks, args.auto_collect)
+    seeds = range(args.seed_start, args.seed_start + args.seeds)
+    rows, computed = sweep(cells, seeds, args.workers, args.cache_dir, script)
+
+    print(f"{len(rows)} 个组合，其中 {computed} 个重新计算，{len(rows) - computed} 个来自缓存")
+    for config, s in rows:
+        params = " ".join(f"{k}={v}" for k, v in sorted(config["params"].items()))
+        loss_time = f"{s['mean_time_to_loss']:.1f}s" if s["mean_time_to_loss"] is not None else "-"
+        print(f"{config['level']:<7} {params:<40} 胜率 {s['win_rate']:6.1%}  "
+              f"平均失败时间 {loss_time:>8}  收集阳光 {s['mean_sun_collected']:.0f}  "
+              f"花费 {s['mean_sun_spent']:.0f}")
+    if args.out:
+        write_report(rows, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 测试在无窗口环境下运行，绘制到虚拟显示设备
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
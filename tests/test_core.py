@@ -0,0 +1,39 @@
+import pytest
+
+from pvz_core import Simulation
+
+LANE = 2
+
+
+def lane_states(step_ticks, seed, ticks=3600):
+    """单行防线的对局：每个大步结束时记录本行的子弹、僵尸、植物与全部阳光。"""
+    sim = Simulation(seed)
+    sim.start_level('normal')
+    sim.sun_count = 10000
+    for col, kind in enumerate(('peashooter', 'peashooter', 'sunflower', 'wallnut')):
+        sim.place_plant(kind, LANE, col)
+    sim.step_ticks = step_ticks
+    states = {}
+    while sim.clock.ticks < ticks:
+        sim.update()
+        # 游戏结束发生在大步中途时，粗步长的最后一帧与逐步推进不可比
+        if sim.game_over or sim.game_win:
+            break
+        states[sim.clock.ticks] = (
+            sorted(b.x for b in sim.bullets if b.row == LANE),
+            sorted((round(z.x, 6), round(z.health, 6)) for z in sim.zombies if z.row == LANE),
+            sorted((p.col, round(p.health, 6)) for p in sim.plants),
+            sorted((s.x, s.y) for s in sim.suns),
+        )
+    return states
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_coarse_step_matches_fine_step(seed):
+    """粗步长下中途生成的阳光、僵尸与子弹只推进余下的小步，与逐步推进的结果一致。"""
+    fine = lane_states(1, seed)
+    coarse = lane_states(10, seed)
+    assert coarse
+    for tick, state in coarse.items():
+        if tick in fine:
+            assert state == fine[tick], tick
@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pvz_env import COLLECT, make_env
+
+
+def test_subprocess_env_matches_in_process():
+    """子进程环境报告的草坪尺寸与逐步结果都与本进程环境相同。"""
+    local = make_env(4, seed=3)
+    remote = make_env(4, workers=2, seed=3)
+    try:
+        assert (remote.rows, remote.cols) == (local.rows, local.cols)
+        assert remote.num_actions == local.num_actions
+        rng = np.random.default_rng(0)
+        a, b = local.reset(), remote.reset()
+        for _ in range(50):
+            actions = rng.integers(0, local.num_actions, 4)
+            actions[rng.random(4) < 0.5] = COLLECT
+            a, ra, da, _ = local.step(actions)
+            b, rb, db, _ = remote.step(actions)
+            assert (ra == rb).all() and (da == db).all()
+            for name in a:
+                assert (a[name] == b[name]).all(), name
+    finally:
+        remote.close()
+
+
+def test_soa_batch_matches_object_env():
+    """soa 后端共用一个 ArrayBatch 推进全部对局，逐步结果与逐局推进的对象后端相同，包括对局重开。"""
+    local = make_env(8, level='hard', seed=1)
+    batch = make_env(8, level='hard', seed=1, backend='soa')
+    rng = np.random.default_rng(2)
+    local.reset(), batch.reset()
+    dones = 0
+    for _ in range(300):
+        actions = rng.integers(0, local.num_actions, 8)
+        actions[rng.random(8) < 0.5] = COLLECT
+        a, ra, da, ia = local.step(actions)
+        b, rb, db, ib = batch.step(actions)
+        assert (ra == rb).all() and (da == db).all() and ia == ib
+        for name in a:
+            assert (a[name] == b[name]).all(), name
+        dones += int(da.sum())
+    assert dones
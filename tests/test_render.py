@@ -0,0 +1,129 @@
+import importlib
+
+import pytest
+
+pygame = pytest.importorskip('pygame')
+
+from pvz_core import SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE, GRID_OFFSET_Y, Zombie
+from pvz_render import Renderer, DirtyRectRenderer, MotionBuffer, scene_entities, view_box, visible_entities
+
+
+@pytest.fixture(scope='module')
+def game_module():
+    module = importlib.import_module('植物大战僵尸')
+    module.init_display()
+    yield module
+    pygame.quit()
+
+
+def new_game(module, rows, cols):
+    game = module.PlantsVsZombies(3, rows=rows, cols=cols)
+    game.start_level('hard')
+    game.show_menu = False
+    game.sun_count = 10**6
+    for row in range(game.board.rows):
+        game.place_plant('peashooter', row, 0)
+        game.place_plant('sunflower', row, 2)
+        zombie = Zombie(row, game.rng)
+        zombie.x = GRID_SIZE * (4 + row)
+        game.add_zombie(zombie)
+    game.lanes.reindex()
+    return game
+
+
+@pytest.mark.parametrize('rows, cols', [(5, 9), (7, 20)])
+def test_dirty_rects_match_full_redraw(game_module, rows, cols):
+    """暂停/继续与滚动视口前后，脏矩形绘制器的画面与整屏重绘逐像素一致。"""
+    game = new_game(game_module, rows, cols)
+    full, dirty = Renderer(), DirtyRectRenderer()
+    expected = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    actual = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    for frame in range(600):
+        if frame in (150, 400):
+            game.paused = True
+        elif frame in (160, 410):
+            game.paused = False
+        if frame % 100 == 50:
+            game.camera.scroll(GRID_SIZE, GRID_SIZE // 2)
+        game.update()
+        full.draw(expected, game)
+        dirty.draw(actual, game)
+        assert pygame.image.tobytes(actual, 'RGB') == pygame.image.tobytes(expected, 'RGB'), frame
+
+
+def test_failed_load_shows_notice(game_module, tmp_path):
+    """读档失败时在顶部显示提示，提示出现与消失时脏矩形画面仍与整屏重绘一致。"""
+    path = str(tmp_path / 'other.pvzs')
+    game_module.save_snapshot(path, game_module.capture(new_game(game_module, 7, 9)))
+    game = new_game(game_module, 5, 9)
+    full, dirty = Renderer(), DirtyRectRenderer()
+    expected = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    actual = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    for frame in range(30):
+        if frame == 10:
+            game.load(path)
+            assert game.notice.startswith('无法读取存档')
+        elif frame == 20:
+            game.notice_until = 0.0
+        game.update()
+        full.draw(expected, game)
+        dirty.draw(actual, game)
+        assert pygame.image.tobytes(actual, 'RGB') == pygame.image.tobytes(expected, 'RGB'), frame
+    assert game.notice is None
+    assert game.board.rows == 5
+
+
+def test_damaged_save_and_unwritable_path_show_notice(game_module, tmp_path):
+    """F9 读到截断或损坏的存档、F5 写不进存档目录时只显示提示，不退出游戏。"""
+    game = new_game(game_module, 5, 9)
+    game.save_path = str(tmp_path / 'missing' / 'save.pvzs')
+    game.handle_state_key(pygame.K_F5)
+    assert game.notice.startswith('无法写入存档')
+    game.save_path = str(tmp_path / 'save.pvzs')
+    game.handle_state_key(pygame.K_F5)
+    with open(game.save_path, 'rb') as f:
+        data = f.read()
+    for damaged in (data[:4], data[:5] + b'garbage', data[:len(data) // 2]):
+        game.notice = None
+        with open(game.save_path, 'wb') as f:
+            f.write(damaged)
+        game.handle_state_key(pygame.K_F9)
+        assert game.notice.startswith('无法读取存档')
+
+
+def test_end_screen_is_still(game_module):
+    """对局结束后继续按真实时间调用 update，结束画面上的实体不再插值抖动。"""
+    game = new_game(game_module, 5, 9)
+    renderer = Renderer()
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    for _ in range(50):
+        game.update(1 / 240)
+    game.game_over = True
+    frames = set()
+    for _ in range(8):
+        game.update(1 / 240)
+        renderer.draw(surface, game)
+        frames.add(pygame.image.tobytes(surface, 'RGB'))
+    assert len(frames) == 1
+
+
+def test_visible_entities_match_coordinate_filter(game_module):
+    """视口裁剪按行取子弹、按空间哈希取阳光，结果与逐个按坐标筛选相同；插值只记录可见实体。"""
+    game = new_game(game_module, 7, 20)
+    camera = game.camera
+    motion = MotionBuffer()
+    seen = set()
+    for frame in range(900):
+        if frame % 150 == 75:
+            camera.scroll(GRID_SIZE * 3, GRID_SIZE // 2)
+        game.update()
+        x0, y0, x1, y1 = view_box(camera)
+        _, bullets, suns, zombies, mowers = visible_entities(game, camera)
+        _, all_bullets, all_suns, _, _ = scene_entities(game)
+        rows = range(max(0, (y0 - GRID_OFFSET_Y) // GRID_SIZE), (y1 - GRID_OFFSET_Y) // GRID_SIZE + 1)
+        assert bullets == [b for b in all_bullets if b.row in rows and x0 <= b.x <= x1]
+        assert suns == [s for s in all_suns if x0 <= s.x <= x1 and y0 <= s.y <= y1]
+        motion.capture(game)
+        assert len(motion.prev) == len(bullets) + len(suns) + len(zombies) + len(mowers)
+        seen.update(('bullet' if bullets else None, 'sun' if suns else None))
+    assert {'bullet', 'sun'} <= seen
@@ -1,395 +1,96 @@
+import argparse
 import pygame
-import sys
 import random
+import sys
 import os
 import time
 
-# 初始化pygame
-pygame.init()
-
-# 屏幕尺寸
-SCREEN_WIDTH = 900
-SCREEN_HEIGHT = 600
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('植物大战僵尸')
-
-# 颜色
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-GREEN = (0, 255, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-BROWN = (139, 69, 19)
-
-# 帧率控制
+from pvz_core import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE, GRID_ROWS, GRID_COLS,
+    GRID_OFFSET_X, GRID_OFFSET_Y, TICK_RATE, Simulation,
+)
+from pvz_render import (
+    PLANT_BUTTONS, PLANT_BUTTON_SIZE, PLANT_BUTTON_Y,
+    RESOURCE_DIR, Camera, MotionBuffer, Renderer, DirtyRectRenderer,
+    menu_button_rects, top_button_rects, set_font_file,
+)
+from pvz_profile import FrameProfiler
+from pvz_replay import (
+    OP_LEVEL, OP_SELECT, OP_PLACE, OP_COLLECT, OP_PAUSE, OP_RESET, OP_END,
+    InputLog, ReplayPlayer, apply_input,
+)
+from pvz_snapshot import SnapshotRing, capture, restore, save_snapshot, load_snapshot
+
+# 窗口在 init_display() 中打开，导入本模块没有副作用
+screen = None
+
+# 帧率控制：模拟按 TICK_RATE 以固定步长推进，与绘制帧率无关
 clock = pygame.time.Clock()
-FPS = 30
-
-# 游戏资源路径
-RESOURCE_DIR = os.path.join(os.path.dirname(__file__), "resources")
-if not os.path.exists(RESOURCE_DIR):
-    os.makedirs(RESOURCE_DIR)
-
-# 游戏参数
-GRID_SIZE = 80  # 格子大小
-GRID_ROWS = 5  # 网格行数
-GRID_COLS = 9  # 网格列数
-GRID_OFFSET_X = 50  # 网格X偏移
-GRID_OFFSET_Y = 100  # 网格Y偏移
-SUN_FALL_SPEED = 2  # 阳光下落速度
-SUN_GENERATION_TIME = 5  # 阳光生成时间间隔(秒)
-ZOMBIE_GENERATION_TIME = 10  # 僵尸生成初始时间间隔(秒)
-LAWN_MOWER_SPEED = 14  # 小推车速度
-
-class LawnMower:
-    def __init__(self, row):
-        self.row = row
-        self.x = GRID_OFFSET_X - 10
-        self.y = GRID_OFFSET_Y + row * GRID_SIZE + GRID_SIZE // 4
-        self.width = GRID_SIZE // 2
-        self.height = GRID_SIZE // 2
-        self.active = True      # 仍可驻守在起始位置
-        self.triggered = False  # 是否已启动
-        self.speed = LAWN_MOWER_SPEED
-
-    def update(self, zombies):
-        if not self.active:
-            return
-        # 如果已触发则向右移动并碾碎本行僵尸
-        if self.triggered:
-            self.x += self.speed
-            for z in zombies[:]:
-                if z.row == self.row and (self.x <= z.x <= self.x + self.width + 20):
-                    z.health = 0
-                    z.active = False
-                    zombies.remove(z)
-            # 移出屏幕后失效
-            if self.x > SCREEN_WIDTH + 20:
-                self.active = False
-
-    def try_trigger(self, zombies):
-        if self.triggered or not self.active:
-            return
-        # 当有僵尸到达行最左端附近时触发
-        for z in zombies:
-            if z.row == self.row and z.x <= GRID_OFFSET_X + 15:
-                self.triggered = True
-                break
-
-    def draw(self, surface):
-        if not self.active:
-            return
-        body_rect = pygame.Rect(int(self.x), int(self.y), self.width, self.height)
-        pygame.draw.rect(surface, (180, 180, 180), body_rect)
-        pygame.draw.rect(surface, BLACK, body_rect, 2)
-        # 车轮
-        wheel_r = self.height // 6
-        pygame.draw.circle(surface, BLACK, (int(self.x + self.width*0.2), int(self.y + self.height)), wheel_r)
-        pygame.draw.circle(surface, BLACK, (int(self.x + self.width*0.8), int(self.y + self.height)), wheel_r)
-
-# 植物类
-class Plant:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.x = GRID_OFFSET_X + col * GRID_SIZE
-        self.y = GRID_OFFSET_Y + row * GRID_SIZE
-        self.health = 100
-        self.cooldown = 0
-        self.last_attack = 0
-        self.attack_interval = 2  # 攻击间隔(秒)
-        self.image = None
-    
-    def update(self, current_time):
-        pass
-    
-    def draw(self, surface):
-        if self.image:
-            surface.blit(self.image, (self.x, self.y))
-        else:
-            # 默认植物绘制
-            pygame.draw.rect(surface, GREEN, (self.x, self.y, GRID_SIZE, GRID_SIZE), 0)
-            pygame.draw.rect(surface, BLACK, (self.x, self.y, GRID_SIZE, GRID_SIZE), 2)
-        
-        # 健康条
-        health_width = (GRID_SIZE - 10) * (self.health / 100)
-        pygame.draw.rect(surface, RED, (self.x + 5, self.y + 5, health_width, 5))
-
-# 向日葵类
-class Sunflower(Plant):
-    def __init__(self, row, col):
-        super().__init__(row, col)
-        self.name = "向日葵"
-        self.cost = 50
-        self.health = 80
-        self.sun_generation_time = 10  # 生成阳光的时间间隔(秒)
-        self.last_generation = time.time()
-    
-    def update(self, current_time, suns):
-        if current_time - self.last_generation >= self.sun_generation_time:
-            self.last_generation = current_time
-            suns.append(Sun(self.x + GRID_SIZE//4, self.y, is_falling=False))
-    
-    def draw(self, surface):
-        # 绘制向日葵
-        pygame.draw.rect(surface, (255, 255, 0), (self.x, self.y, GRID_SIZE, GRID_SIZE), 0)
-        pygame.draw.rect(surface, BLACK, (self.x, self.y, GRID_SIZE, GRID_SIZE), 2)
-        
-        # 绘制脸
-        face_center = (self.x + GRID_SIZE//2, self.y + GRID_SIZE//2)
-        pygame.draw.circle(surface, (139, 69, 19), face_center, GRID_SIZE//3)
-        
-        # 绘制花瓣
-        petal_radius = GRID_SIZE//4
-        pygame.draw.circle(surface, (255, 255, 0), (face_center[0], face_center[1] - petal_radius), petal_radius)
-        pygame.draw.circle(surface, (255, 255, 0), (face_center[0] + petal_radius, face_center[1]), petal_radius)
-        pygame.draw.circle(surface, (255, 255, 0), (face_center[0], face_center[1] + petal_radius), petal_radius)
-        pygame.draw.circle(surface, (255, 255, 0), (face_center[0] - petal_radius, face_center[1]), petal_radius)
-        
-        # 健康条
-        health_width = (GRID_SIZE - 10) * (self.health / 80)
-        pygame.draw.rect(surface, RED, (self.x + 5, self.y + 5, health_width, 5))
-
-# 豌豆射手类
-class Peashooter(Plant):
-    def __init__(self, row, col):
-        super().__init__(row, col)
-        self.name = "豌豆射手"
-        self.cost = 100
-        self.health = 100
-        self.attack_power = 20
-        self.attack_interval = 1.5  # 攻击间隔(秒)
-        self.last_attack = time.time()
-    
-    def update(self, current_time, bullets, zombies):
-        # 检查这一行是否有僵尸
-        zombies_in_row = [z for z in zombies if z.row == self.row]
-        if zombies_in_row and current_time - self.last_attack >= self.attack_interval:
-            self.last_attack = current_time
-            bullets.append(Bullet(self.x + GRID_SIZE, self.y + GRID_SIZE//2, self.row, self.attack_power))
-    
-    def draw(self, surface):
-        # 绘制豌豆射手
-        pygame.draw.rect(surface, (0, 200, 0), (self.x, self.y, GRID_SIZE, GRID_SIZE), 0)
-        pygame.draw.rect(surface, BLACK, (self.x, self.y, GRID_SIZE, GRID_SIZE), 2)
-        
-        # 绘制头部
-        head_center = (self.x + GRID_SIZE*2//3, self.y + GRID_SIZE//2)
-        pygame.draw.circle(surface, (0, 100, 0), head_center, GRID_SIZE//3)
-        
-        # 绘制嘴巴(发射口)
-        pygame.draw.circle(surface, BLACK, (head_center[0] + GRID_SIZE//4, head_center[1]), GRID_SIZE//8)
-        
-        # 健康条
-        health_width = (GRID_SIZE - 10) * (self.health / 100)
-        pygame.draw.rect(surface, RED, (self.x + 5, self.y + 5, health_width, 5))
-
-# 坚果墙类
-class WallNut(Plant):
-    def __init__(self, row, col):
-        super().__init__(row, col)
-        self.name = "坚果墙"
-        self.cost = 50
-        self.health = 400  # 较高的生命值
-    
-    def draw(self, surface):
-        # 绘制坚果墙
-        pygame.draw.rect(surface, BROWN, (self.x, self.y, GRID_SIZE, GRID_SIZE), 0)
-        pygame.draw.rect(surface, BLACK, (self.x, self.y, GRID_SIZE, GRID_SIZE), 2)
-        
-        # 绘制面部特征
-        face_center = (self.x + GRID_SIZE//2, self.y + GRID_SIZE//2)
-        
-        # 眼睛
-        pygame.draw.circle(surface, BLACK, (face_center[0] - 10, face_center[1] - 10), 5)
-        pygame.draw.circle(surface, BLACK, (face_center[0] + 10, face_center[1] - 10), 5)
-        
-        # 根据健康程度绘制不同表情
-        if self.health > 266:
-            # 微笑
-            pygame.draw.arc(surface, BLACK, (face_center[0] - 15, face_center[1], 30, 20), 0, 3.14, 2)
-        elif self.health > 133:
-            # 平淡
-            pygame.draw.line(surface, BLACK, (face_center[0] - 15, face_center[1] + 10), 
-                             (face_center[0] + 15, face_center[1] + 10), 2)
-        else:
-            # 忧虑
-            pygame.draw.arc(surface, BLACK, (face_center[0] - 15, face_center[1] + 10, 30, 20), 3.14, 6.28, 2)
-        
-        # 健康条
-        health_width = (GRID_SIZE - 10) * (self.health / 400)
-        pygame.draw.rect(surface, RED, (self.x + 5, self.y + 5, health_width, 5))
-
-# 子弹类
-class Bullet:
-    def __init__(self, x, y, row, damage):
-        self.x = x
-        self.y = y
-        self.row = row
-        self.damage = damage
-        self.speed = 10
-        self.active = True
-    
-    def update(self):
-        self.x += self.speed
-        if self.x > SCREEN_WIDTH:
-            self.active = False
-    
-    def draw(self, surface):
-        pygame.draw.circle(surface, (0, 255, 0), (int(self.x), int(self.y)), 5)
-
-# 阳光类
-class Sun:
-    def __init__(self, x, y, is_falling=True):
-        self.x = x
-        self.y = y
-        self.is_falling = is_falling
-        self.collected = False
-        self.fall_speed = SUN_FALL_SPEED
-        self.target_y = random.randint(150, 450) if is_falling else y
-        self.radius = 20
-        self.creation_time = time.time()
-        self.lifespan = 10  # 10秒后消失
-    
-    def update(self):
-        if self.is_falling and self.y < self.target_y:
-            self.y += self.fall_speed
-    
-    def is_expired(self, current_time):
-        return current_time - self.creation_time > self.lifespan
-    
-    def draw(self, surface):
-        pygame.draw.circle(surface, (255, 255, 0), (int(self.x), int(self.y)), self.radius)
-        pygame.draw.circle(surface, (255, 200, 0), (int(self.x), int(self.y)), self.radius - 5)
-
-# 僵尸类
-class Zombie:
-    def __init__(self, row):
-        self.row = row
-        self.x = SCREEN_WIDTH - 50
-        self.y = GRID_OFFSET_Y + row * GRID_SIZE
-        self.speed = random.uniform(0.3, 0.7)
-        self.health = 100
-        self.attack_power = 0.5  # 每帧造成的伤害
-        self.attacking = False
-        self.target_plant = None
-        self.active = True
-    
-    def update(self, plants):
-        if self.attacking and self.target_plant:
-            self.target_plant.health -= self.attack_power
-            if self.target_plant.health <= 0:
-                # 添加检查确保目标植物仍在列表中
-                if self.target_plant in plants:
-                    plants.remove(self.target_plant)
-                self.attacking = False
-                self.target_plant = None
-        else:
-            self.x -= self.speed
-            
-            # 检查是否有植物在同一行且在接触范围内
-            for plant in plants:
-                if plant.row == self.row and self.x - (plant.x + GRID_SIZE) < 10 and self.x > plant.x:
-                    self.attacking = True
-                    self.target_plant = plant
-                    break
-        
-        # 检查是否已到达最左侧
-        if self.x <= GRID_OFFSET_X:
-            return True  # 游戏结束标志
-        
-        # 检查是否死亡
-        if self.health <= 0:
-            self.active = False
-        
-        return False
-    
-    def draw(self, surface):
-        # 绘制僵尸
-        zombie_color = (150, 150, 150)
-        pygame.draw.rect(surface, zombie_color, (self.x - 30, self.y, 30, GRID_SIZE), 0)
-        
-        # 头部
-        head_y = self.y + 10
-        pygame.draw.circle(surface, zombie_color, (int(self.x - 15), int(head_y)), 20)
-        
-        # 眼睛
-        eye_offset = 5 if self.attacking else 0
-        pygame.draw.circle(surface, RED, (int(self.x - 20 + eye_offset), int(head_y - 5)), 5)
-        pygame.draw.circle(surface, RED, (int(self.x - 5 + eye_offset), int(head_y - 5)), 5)
-        
-        # 嘴巴
-        mouth_y = head_y + 10
-        pygame.draw.rect(surface, (100, 0, 0), (int(self.x - 25), int(mouth_y), 20, 5))
-        
-        # 健康条
-        health_width = 30 * (self.health / 100)
-        pygame.draw.rect(surface, RED, (self.x - 30, self.y - 10, health_width, 5))
-
-class FastZombie(Zombie):
-    def __init__(self, row):
-        super().__init__(row)
-        self.speed = random.uniform(0.8, 1.2)
-        self.health = 80
-        self.attack_power = 0.4
-    def draw(self, surface):
-        color = (120, 160, 120)
-        pygame.draw.rect(surface, color, (self.x - 28, self.y + 5, 28, GRID_SIZE - 10), 0)
-        pygame.draw.circle(surface, color, (int(self.x - 14), int(self.y + 15)), 18)
-        health_width = 28 * (self.health / 80)
-        pygame.draw.rect(surface, RED, (self.x - 28, self.y - 10, health_width, 5))
-
-class TankZombie(Zombie):
-    def __init__(self, row):
-        super().__init__(row)
-        self.speed = random.uniform(0.2, 0.4)
-        self.health = 200
-        self.attack_power = 0.8
-    def draw(self, surface):
-        color = (100, 100, 100)
-        pygame.draw.rect(surface, color, (self.x - 35, self.y - 5, 35, GRID_SIZE + 10), 0)
-        pygame.draw.circle(surface, color, (int(self.x - 18), int(self.y + 5)), 22)
-        health_width = 35 * (self.health / 200)
-        pygame.draw.rect(surface, RED, (self.x - 35, self.y - 12, health_width, 6))
-
-# 游戏类
-class PlantsVsZombies:
-    def __init__(self):
-        self.sun_count = 100
-        self.plants = []
-        self.zombies = []
-        self.bullets = []
-        self.suns = []
-        self.game_over = False
-        self.game_win = False
-        self.wave_count = 0
-        self.max_waves = 5
-        self.last_sun_generation = time.time()
-        self.last_zombie_generation = time.time()
-        self.zombie_interval = ZOMBIE_GENERATION_TIME
+RENDER_FPS = 120  # 绘制帧率上限
+TICK_TIME = 1 / TICK_RATE
+MAX_FRAME_TIME = 0.25  # 单帧计入的最长时间，机器过慢时宁可放慢也不无限追赶
+# 快进倍率(游戏时间相对真实时间的倍数)，None 表示不限速
+SPEED_STEPS = [1, 10, 100, None]
+# 方向键滚动视口: 按键 -> (dx, dy)
+SCROLL_KEYS = {
+    pygame.K_LEFT: (-GRID_SIZE, 0),
+    pygame.K_RIGHT: (GRID_SIZE, 0),
+    pygame.K_UP: (0, -GRID_SIZE),
+    pygame.K_DOWN: (0, GRID_SIZE),
+}
+# 倒带记录：每隔多少模拟步存一个快照，退格键一次倒回多少个快照
+SNAPSHOT_INTERVAL = TICK_RATE
+REWIND_STEPS = 5
+# F5 存档/F9 读档的默认文件
+DEFAULT_SAVE_PATH = 'pvz_save.pvzs'
+# 顶部提示文字显示的秒数(真实时间)
+NOTICE_TIME = 3.0
+
+
+def init_display():
+    """只初始化显示与字体子系统并打开窗口；游戏没有声音，不初始化音频。"""
+    global screen
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption('植物大战僵尸')
+    return screen
+
+# 游戏类：在模拟核心之上处理鼠标键盘输入与绘制
+class PlantsVsZombies(Simulation):
+    def __init__(self, seed=None, renderer=None, rows=None, cols=None):
+        # 重开时沿用原来的草坪尺寸
+        board = getattr(self, 'board', None)
+        rows = rows or (board.rows if board else GRID_ROWS)
+        cols = cols or (board.cols if board else GRID_COLS)
+        super().__init__(seed, rows=rows, cols=cols)
+        # 草坪大于窗口时通过视口滚动查看
+        self.camera = Camera(self.board)
         self.selected_plant = None
-        self.plant_types = {
-            "sunflower": {"name": "向日葵", "cost": 50, "class": Sunflower},
-            "peashooter": {"name": "豌豆射手", "cost": 100, "class": Peashooter},
-            "wallnut": {"name": "坚果墙", "cost": 50, "class": WallNut}
-        }
-        self.font = pygame.font.SysFont('SimHei', 24)
-        self.large_font = pygame.font.SysFont('SimHei', 48)
-        self.bg_color = (220, 255, 220)
-        # 初始化每一行的小推车
-        self.lawn_mowers = [LawnMower(row) for row in range(GRID_ROWS)]
+        self.speed = SPEED_STEPS[0]
+        # 重开时沿用已有的绘制器，保留其缓存
+        self.renderer = renderer or getattr(self, 'renderer', None) or Renderer()
+        # 性能分析器同样跨重开保留，未开启时为 None
+        self.profiler = getattr(self, 'profiler', None)
+        # 录制中的输入日志，跨重开保留
+        self.recorder = getattr(self, 'recorder', None)
+        # 最近的快照用于倒带，另存每一波开始时的快照用于从该波重来
+        self.history = SnapshotRing()
+        self.wave_starts = {}
+        self.save_path = getattr(self, 'save_path', DEFAULT_SAVE_PATH)
+        # 尚未推进的真实时间(秒)与绘制插值用的上一步位置
+        self.accumulator = 0.0
+        self.motion = MotionBuffer()
         # 关卡选择
-        self.level = None  # 'easy' | 'normal' | 'hard'
         self.show_menu = True
         # 暂停与UI
         self.paused = False
+        # 顶部的临时提示文字及其消失时刻
+        self.notice = None
+        self.notice_until = 0.0
         # 顶部功能按钮布局
-        self.ui_buttons = {
-            'pause': pygame.Rect(SCREEN_WIDTH - 330, 50, 90, 36),
-            'restart': pygame.Rect(SCREEN_WIDTH - 230, 50, 90, 36),
-            'menu': pygame.Rect(SCREEN_WIDTH - 130, 50, 90, 36)
-        }
-    
+        self.ui_buttons = top_button_rects()
+
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -398,11 +99,13 @@ class PlantsVsZombies:
                 if event.key == pygame.K_ESCAPE:
                     return False
                 elif event.key == pygame.K_r and (self.game_over or self.game_win):
-                    self.__init__()  # 重置游戏
+                    self.input(OP_RESET, random.randrange(2**32), None)  # 重置游戏
+                elif not self.handle_state_key(event.key):
+                    self.handle_view_key(event.key)
                 # 键盘不再控制暂停/重开/主菜单
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = event.pos
-                
+
                 # 如果游戏结束，忽略点击
                 if self.game_over or self.game_win:
                     return True
@@ -418,43 +121,75 @@ class PlantsVsZombies:
                 # 暂停状态下不处理战斗点击（除按钮外已返回）
                 if self.paused:
                     return True
-                    
-                # 检查是否点击了选择植物按钮
-                if y < GRID_OFFSET_Y:
+
+                # 检查是否点击了选择植物按钮(顶部按钮条固定在屏幕上)
+                on_buttons = y < GRID_OFFSET_Y
+                if on_buttons:
                     self.handle_plant_selection(x, y)
+                # 其余判断使用世界坐标
+                x, y = self.camera.to_world(x, y)
                 # 检查是否点击了网格放置植物
-                elif (GRID_OFFSET_X <= x <= GRID_OFFSET_X + GRID_COLS * GRID_SIZE and
-                      GRID_OFFSET_Y <= y <= GRID_OFFSET_Y + GRID_ROWS * GRID_SIZE):
+                if not on_buttons and (
+                        GRID_OFFSET_X <= x <= GRID_OFFSET_X + self.board.cols * GRID_SIZE and
+                        GRID_OFFSET_Y <= y <= GRID_OFFSET_Y + self.board.rows * GRID_SIZE):
                     self.handle_grid_click(x, y)
-                
+
                 # 检查是否收集阳光
-                self.collect_suns(x, y)
-        
+                self.input(OP_COLLECT, x, y)
+
+        return True
+
+    def handle_view_key(self, key):
+        """不改变对局的按键：快进、滚动视口与性能统计，回放时同样可用。"""
+        if key == pygame.K_f:
+            # 切换快进倍率
+            idx = SPEED_STEPS.index(self.speed)
+            self.speed = SPEED_STEPS[(idx + 1) % len(SPEED_STEPS)]
+        elif key in SCROLL_KEYS:
+            self.camera.scroll(*SCROLL_KEYS[key])
+        elif key == pygame.K_F3:
+            # 切换性能统计叠加层，首次按下时才开始计时
+            if self.profiler is None:
+                self.profiler = FrameProfiler()
+                self.profiler.attach(self)
+            self.profiler.show_overlay = not self.profiler.show_overlay
+
+    def handle_state_key(self, key):
+        """倒带、从本波重来与存读档；这些操作无法写入回放，录制时不响应。"""
+        if self.recorder is not None or self.show_menu:
+            return False
+        if key == pygame.K_BACKSPACE:
+            self.rewind(REWIND_STEPS)
+        elif key == pygame.K_w:
+            self.restart_from_wave(self.wave_count)
+        elif key == pygame.K_F5:
+            try:
+                save_snapshot(self.save_path, capture(self))
+            except OSError as e:
+                self.show_notice(f"无法写入存档: {e}")
+        elif key == pygame.K_F9:
+            if os.path.exists(self.save_path):
+                self.load(self.save_path)
+        else:
+            return False
+        return True
+
+    def handle_replay_events(self):
+        """回放时忽略鼠标，只响应退出与不改变对局的按键。"""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return False
+                self.handle_view_key(event.key)
         return True
 
     def handle_menu_click(self, x, y):
-        btn_w, btn_h = 180, 60
-        top_y = SCREEN_HEIGHT//2 - 120
-        centers = [
-            (SCREEN_WIDTH//2 - btn_w//2, top_y),
-            (SCREEN_WIDTH//2 - btn_w//2, top_y + 80),
-            (SCREEN_WIDTH//2 - btn_w//2, top_y + 160)
-        ]
-        labels = [('easy', '简单'), ('normal', '普通'), ('hard', '困难')]
-        for idx, (lx, ly) in enumerate(centers):
-            if lx <= x <= lx + btn_w and ly <= y <= ly + btn_h:
-                self.level = labels[idx][0]
+        for level, _, rect in menu_button_rects():
+            if rect.collidepoint(x, y):
                 # 根据关卡配置参数
-                if self.level == 'easy':
-                    self.max_waves = 4
-                    self.zombie_interval = 10
-                elif self.level == 'normal':
-                    self.max_waves = 5
-                    self.zombie_interval = 8
-                else:
-                    self.max_waves = 7
-                    self.zombie_interval = 6
-                self.show_menu = False
+                self.input(OP_LEVEL, level)
                 break
 
     def handle_top_buttons_click(self, x, y):
@@ -463,373 +198,249 @@ class PlantsVsZombies:
             return False
         # 暂停/恢复
         if self.ui_buttons['pause'].collidepoint(x, y) and not (self.game_over or self.game_win):
-            self.paused = not self.paused
+            self.input(OP_PAUSE)
             return True
         # 重开当前关卡
         if self.ui_buttons['restart'].collidepoint(x, y):
-            current_level = self.level
-            self.__init__()
-            self.show_menu = False
-            self.level = current_level
+            self.input(OP_RESET, random.randrange(2**32), self.level)
             return True
         # 返回主菜单
         if self.ui_buttons['menu'].collidepoint(x, y):
-            self.__init__()
+            self.input(OP_RESET, random.randrange(2**32), None)
             return True
         return False
-    
+
     def handle_plant_selection(self, x, y):
-        button_width = 100
-        button_height = 60
-        button_y = 20
-        
-        # 向日葵按钮
-        sunflower_button_x = 50
-        if (sunflower_button_x <= x <= sunflower_button_x + button_width and
-            button_y <= y <= button_y + button_height):
-            if self.sun_count >= self.plant_types["sunflower"]["cost"]:
-                self.selected_plant = "sunflower"
-        
-        # 豌豆射手按钮
-        peashooter_button_x = 170
-        if (peashooter_button_x <= x <= peashooter_button_x + button_width and
-            button_y <= y <= button_y + button_height):
-            if self.sun_count >= self.plant_types["peashooter"]["cost"]:
-                self.selected_plant = "peashooter"
-        
-        # 坚果墙按钮
-        wallnut_button_x = 290
-        if (wallnut_button_x <= x <= wallnut_button_x + button_width and
-            button_y <= y <= button_y + button_height):
-            if self.sun_count >= self.plant_types["wallnut"]["cost"]:
-                self.selected_plant = "wallnut"
-    
+        button_width, button_height = PLANT_BUTTON_SIZE
+        button_y = PLANT_BUTTON_Y
+        for kind, button_x, _, _ in PLANT_BUTTONS:
+            if (button_x <= x <= button_x + button_width and
+                button_y <= y <= button_y + button_height):
+                if self.sun_count >= self.plant_types[kind]["cost"]:
+                    self.input(OP_SELECT, kind)
+
     def handle_grid_click(self, x, y):
         if self.selected_plant:
             col = (x - GRID_OFFSET_X) // GRID_SIZE
             row = (y - GRID_OFFSET_Y) // GRID_SIZE
-            
+
             # 检查该位置是否已有植物
-            for plant in self.plants:
-                if plant.row == row and plant.col == col:
-                    return
-            
-            # 放置选定的植物
-            plant_info = self.plant_types[self.selected_plant]
-            if self.sun_count >= plant_info["cost"]:
-                self.sun_count -= plant_info["cost"]
-                self.plants.append(plant_info["class"](row, col))
-            
-            self.selected_plant = None
-    
-    def collect_suns(self, x, y):
-        for sun in self.suns[:]:
-            if not sun.collected and ((x - sun.x)**2 + (y - sun.y)**2) <= sun.radius**2:
-                sun.collected = True
-                self.sun_count += 25
-                self.suns.remove(sun)
-    
-    def generate_sun(self, current_time):
-        if current_time - self.last_sun_generation >= SUN_GENERATION_TIME:
-            self.last_sun_generation = current_time
-            self.suns.append(Sun(random.randint(100, SCREEN_WIDTH - 100), -20))
-    
-    def generate_zombie(self, current_time):
-        # 随着波数增加，生成僵尸的频率增加
-        if current_time - self.last_zombie_generation >= self.zombie_interval:
-            self.last_zombie_generation = current_time
-            
-            # 计算当前应该生成多少僵尸
-            base = 1 if self.level == 'easy' else (2 if self.level == 'normal' else 3)
-            zombies_to_spawn = min(base + self.wave_count//2, 4)
-            
-            for _ in range(zombies_to_spawn):
-                row = random.randint(0, GRID_ROWS - 1)
-                # 按关卡与波次选择僵尸类型
-                r = random.random()
-                if self.level == 'easy':
-                    z = Zombie(row) if r < 0.7 else FastZombie(row)
-                elif self.level == 'normal':
-                    z = FastZombie(row) if r < 0.5 else Zombie(row)
-                else:
-                    # 困难包含重装僵尸
-                    if r < 0.4:
-                        z = FastZombie(row)
-                    elif r < 0.8:
-                        z = Zombie(row)
-                    else:
-                        z = TankZombie(row)
-                self.zombies.append(z)
-            
-            self.wave_count += 1
-            
-            # 减少生成间隔，增加难度
-            self.zombie_interval = max(3, ZOMBIE_GENERATION_TIME - self.wave_count)
-            
-            # 检查是否达到最大波数
-            if self.wave_count >= self.max_waves and len(self.zombies) == 0:
-                self.game_win = True
-    
-    def update(self):
-        current_time = time.time()
-        
-        if not self.game_over and not self.game_win:
-            if self.show_menu:
-                return
-            if self.paused:
+            if self.is_occupied(row, col):
                 return
-            # 生成阳光
-            self.generate_sun(current_time)
-            
-            # 更新阳光
-            for sun in self.suns[:]:
-                sun.update()
-                if sun.is_expired(current_time):
-                    self.suns.remove(sun)
-            
-            # 生成僵尸
-            if self.wave_count < self.max_waves or len(self.zombies) > 0:
-                self.generate_zombie(current_time)
-            
-            # 更新植物
-            for plant in self.plants:
-                if isinstance(plant, Sunflower):
-                    plant.update(current_time, self.suns)
-                elif isinstance(plant, Peashooter):
-                    plant.update(current_time, self.bullets, self.zombies)
-            
-            # 更新子弹
-            for bullet in self.bullets[:]:
-                bullet.update()
-                if not bullet.active:
-                    self.bullets.remove(bullet)
-                else:
-                    # 检查子弹是否击中僵尸
-                    for zombie in self.zombies:
-                        if (zombie.row == bullet.row and 
-                            zombie.x - 30 <= bullet.x <= zombie.x + 10):
-                            zombie.health -= bullet.damage
-                            self.bullets.remove(bullet)
-                            break
-            
-            # 更新僵尸
-            for zombie in self.zombies[:]:
-                game_over = zombie.update(self.plants)
-                if game_over:
-                    # 尝试触发对应行的小推车
-                    for mower in self.lawn_mowers:
-                        if mower.row == zombie.row:
-                            mower.try_trigger(self.zombies)
-                            break
-                    # 若该行小推车未能及时触发或已用完，则游戏结束
-                    if not any(m.row == zombie.row and m.active for m in self.lawn_mowers):
-                        self.game_over = True
-                        break
-                if not zombie.active:
-                    self.zombies.remove(zombie)
-
-            # 更新并触发小推车
-            for mower in self.lawn_mowers:
-                mower.try_trigger(self.zombies)
-                mower.update(self.zombies)
-            
-            # 检查胜利条件
-            if self.wave_count >= self.max_waves and len(self.zombies) == 0:
-                self.game_win = True
-    
-    def draw(self, surface):
-        # 清屏
-        surface.fill(self.bg_color)
 
-        # 菜单界面
-        if self.show_menu:
-            title = self.large_font.render('选择关卡', True, BLACK)
-            surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, SCREEN_HEIGHT//2 - 200))
-            btn_w, btn_h = 180, 60
-            top_y = SCREEN_HEIGHT//2 - 120
-            texts = [('简单', 'easy'), ('普通', 'normal'), ('困难', 'hard')]
-            colors = [(180, 255, 180), (160, 240, 160), (140, 220, 140)]
-            for i, (label, key) in enumerate(texts):
-                x = SCREEN_WIDTH//2 - btn_w//2
-                y = top_y + i*80
-                pygame.draw.rect(surface, colors[i], (x, y, btn_w, btn_h))
-                pygame.draw.rect(surface, BLACK, (x, y, btn_w, btn_h), 2)
-                txt = self.font.render(label, True, BLACK)
-                surface.blit(txt, (x + btn_w//2 - txt.get_width()//2, y + btn_h//2 - txt.get_height()//2))
-            pygame.display.flip()
+            # 放置选定的植物
+            self.input(OP_PLACE, self.selected_plant, row, col)
+
+    def input(self, op, *args):
+        """执行一条玩家操作；录制时连同当前步数写入输入日志。"""
+        tick = self.clock.ticks
+        collected = self.sun_collected
+        apply_input(self, op, *args)
+        # 没有收集到阳光的点击不影响对局，不必记录
+        if self.recorder is not None and (op != OP_COLLECT or self.sun_collected != collected):
+            self.recorder.add(tick, op, *args)
+
+    def reset(self, seed):
+        """以给定种子重开，保留草坪尺寸、绘制器、分析器与录制器。"""
+        self.__init__(seed)
+
+    def update(self, elapsed=None, budget=1 / RENDER_FPS):
+        """按上一帧经过的真实时间 elapsed(秒)推进若干固定步长；不给出时推进 speed 步。
+
+        绘制慢时一帧推进多步，游戏速度不受影响；绘制快时有的帧不推进，
+        由绘制层按剩余时间插值。快进只改变换算倍率，不改变结果。
+        不限速时每帧最多推进 budget 秒的真实时间，之后交给绘制。
+        """
+        if self.notice is not None and time.perf_counter() >= self.notice_until:
+            self.notice = None
+        if self.show_menu or self.paused:
+            self.accumulator = 0.0
+            return
+        if self.game_over or self.game_win:
+            self.freeze_motion()
             return
-        
-        # 绘制草坪网格背景
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS):
-                rect = pygame.Rect(
-                    GRID_OFFSET_X + col * GRID_SIZE,
-                    GRID_OFFSET_Y + row * GRID_SIZE,
-                    GRID_SIZE, GRID_SIZE
-                )
-                if (row + col) % 2 == 0:
-                    pygame.draw.rect(surface, (200, 255, 200), rect)
-                else:
-                    pygame.draw.rect(surface, (180, 255, 180), rect)
-                pygame.draw.rect(surface, (100, 200, 100), rect, 1)
-        
-        # 绘制植物
-        for plant in self.plants:
-            plant.draw(surface)
-        
-        # 绘制子弹
-        for bullet in self.bullets:
-            bullet.draw(surface)
-        
-        # 绘制阳光
-        for sun in self.suns:
-            if not sun.collected:
-                sun.draw(surface)
-        
-        # 绘制僵尸
-        for zombie in self.zombies:
-            zombie.draw(surface)
-
-        # 绘制小推车
-        for mower in self.lawn_mowers:
-            mower.draw(surface)
-        
-        # 绘制UI
-        self.draw_ui(surface)
-        
-        # 如果游戏结束，显示结束画面
-        if self.game_over:
-            self.draw_game_over(surface)
-        elif self.game_win:
-            self.draw_game_win(surface)
-        elif self.paused:
-            self.draw_pause(surface)
-        
-        pygame.display.flip()
-    
-    def draw_ui(self, surface):
-        # 绘制阳光数量
-        sun_text = self.font.render(f"阳光: {self.sun_count}", True, BLACK)
-        surface.blit(sun_text, (10, 1))
-        
-        # 绘制波数
-        wave_text = self.font.render(f"波数: {self.wave_count}/{self.max_waves}", True, BLACK)
-        surface.blit(wave_text, (SCREEN_WIDTH - 150, 1))
-
-        # 绘制当前关卡
-        if self.level:
-            level_map = {'easy': '简单', 'normal': '普通', 'hard': '困难'}
-            lvl_text = self.font.render(f"关卡: {level_map.get(self.level, '')}", True, BLACK)
-            surface.blit(lvl_text, (SCREEN_WIDTH - 300, 1))
-
-        # 功能按钮（暂停/重开/主菜单）
-        def draw_btn(rect, label, color):
-            pygame.draw.rect(surface, color, rect)
-            pygame.draw.rect(surface, BLACK, rect, 2)
-            t = self.font.render(label, True, BLACK)
-            surface.blit(t, (rect.centerx - t.get_width()//2, rect.centery - t.get_height()//2))
-        draw_btn(self.ui_buttons['pause'], '暂停/继续', (230, 230, 230))
-        draw_btn(self.ui_buttons['restart'], '重新开始', (230, 230, 230))
-        draw_btn(self.ui_buttons['menu'], '主菜单', (230, 230, 230))
-        
-        # 绘制植物选择按钮
-        button_width = 100
-        button_height = 60
-        button_y = 20
-        
-        # 向日葵按钮
-        sunflower_button_x = 50
-        pygame.draw.rect(surface, (255, 255, 0) if self.selected_plant == "sunflower" else (220, 220, 0), 
-                         (sunflower_button_x, button_y, button_width, button_height))
-        pygame.draw.rect(surface, BLACK, (sunflower_button_x, button_y, button_width, button_height), 2)
-        plant_text = self.font.render(f"向日葵", True, BLACK)
-        cost_text = self.font.render(f"{self.plant_types['sunflower']['cost']}", True, BLACK)
-        surface.blit(plant_text, (sunflower_button_x + 10, button_y + 10))
-        surface.blit(cost_text, (sunflower_button_x + 10, button_y + 35))
-        
-        # 豌豆射手按钮
-        peashooter_button_x = 170
-        pygame.draw.rect(surface, (0, 200, 0) if self.selected_plant == "peashooter" else (0, 150, 0), 
-                         (peashooter_button_x, button_y, button_width, button_height))
-        pygame.draw.rect(surface, BLACK, (peashooter_button_x, button_y, button_width, button_height), 2)
-        plant_text = self.font.render(f"豌豆射手", True, BLACK)
-        cost_text = self.font.render(f"{self.plant_types['peashooter']['cost']}", True, BLACK)
-        surface.blit(plant_text, (peashooter_button_x + 10, button_y + 10))
-        surface.blit(cost_text, (peashooter_button_x + 10, button_y + 35))
-        
-        # 坚果墙按钮
-        wallnut_button_x = 290
-        pygame.draw.rect(surface, BROWN if self.selected_plant == "wallnut" else (100, 50, 0), 
-                         (wallnut_button_x, button_y, button_width, button_height))
-        pygame.draw.rect(surface, BLACK, (wallnut_button_x, button_y, button_width, button_height), 2)
-        plant_text = self.font.render(f"坚果墙", True, BLACK)
-        cost_text = self.font.render(f"{self.plant_types['wallnut']['cost']}", True, BLACK)
-        surface.blit(plant_text, (wallnut_button_x + 10, button_y + 10))
-        surface.blit(cost_text, (wallnut_button_x + 10, button_y + 35))
-    
-    def draw_game_over(self, surface):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        surface.blit(overlay, (0, 0))
-        
-        game_over_text = self.large_font.render("游戏结束!", True, RED)
-        restart_text = self.font.render("按 R 键重新开始", True, WHITE)
-        
-        surface.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2, 
-                                     SCREEN_HEIGHT//2 - game_over_text.get_height()//2))
-        surface.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, 
-                                   SCREEN_HEIGHT//2 + 50))
-    
-    def draw_game_win(self, surface):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLUE)
-        surface.blit(overlay, (0, 0))
-        
-        win_text = self.large_font.render("胜利!", True, WHITE)
-        restart_text = self.font.render("按 R 键重新开始", True, WHITE)
-        
-        surface.blit(win_text, (SCREEN_WIDTH//2 - win_text.get_width()//2, 
-                               SCREEN_HEIGHT//2 - win_text.get_height()//2))
-        surface.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, 
-                                   SCREEN_HEIGHT//2 + 50))
-
-    def draw_pause(self, surface):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(160)
-        overlay.fill((50, 50, 50))
-        surface.blit(overlay, (0, 0))
-        pause_text = self.large_font.render("暂停", True, WHITE)
-        tips_text = self.font.render("点击顶部按钮：暂停/继续、重新开始、主菜单", True, WHITE)
-        surface.blit(pause_text, (SCREEN_WIDTH//2 - pause_text.get_width()//2,
-                                  SCREEN_HEIGHT//2 - pause_text.get_height()//2 - 20))
-        surface.blit(tips_text, (SCREEN_WIDTH//2 - tips_text.get_width()//2,
-                                 SCREEN_HEIGHT//2 + 20))
-
-        def draw_pause(self, surface):
-                overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                overlay.set_alpha(160)
-                overlay.fill((50, 50, 50))
-                surface.blit(overlay, (0, 0))
-                pause_text = self.large_font.render("暂停", True, WHITE)
-                tips_text = self.font.render("按 P 恢复，R 重开，M 主菜单", True, WHITE)
-                surface.blit(pause_text, (SCREEN_WIDTH//2 - pause_text.get_width()//2,
-                                                                    SCREEN_HEIGHT//2 - pause_text.get_height()//2 - 20))
-                surface.blit(tips_text, (SCREEN_WIDTH//2 - tips_text.get_width()//2,
-                                                                 SCREEN_HEIGHT//2 + 20))
+        if self.speed is None:
+            self.motion.clear()
+            deadline = time.perf_counter() + budget
+            while not (self.game_over or self.game_win) and time.perf_counter() < deadline:
+                super().update()
+                self.record_history()
+            return
+        if elapsed is None:
+            ticks = self.speed
+        else:
+            self.accumulator += min(elapsed, MAX_FRAME_TIME) * self.speed
+            ticks = int(self.accumulator / TICK_TIME)
+            self.accumulator -= ticks * TICK_TIME
+        for i in range(ticks):
+            if self.game_over or self.game_win:
+                break
+            if i == ticks - 1:
+                self.motion.capture(self)
+            super().update()
+            self.record_history()
+        if self.game_over or self.game_win:
+            self.freeze_motion()
+            return
+        self.motion.alpha = 1.0 if elapsed is None else self.accumulator / TICK_TIME
+
+    def freeze_motion(self):
+        """结束画面静止不动：不再累积时间，按最终位置绘制，不做插值。"""
+        self.accumulator = 0.0
+        self.motion.clear()
+
+    def record_history(self):
+        """每隔 SNAPSHOT_INTERVAL 步存一个倒带快照；新的一波开始时另存一份。"""
+        if self.wave_count not in self.wave_starts:
+            self.wave_starts[self.wave_count] = capture(self)
+        last = self.history.latest_tick()
+        if last is None or self.clock.ticks - last >= SNAPSHOT_INTERVAL:
+            self.history.push(capture(self))
+
+    def rewind(self, steps):
+        """倒回 steps 个快照之前；结束画面下同样可用。"""
+        snap = self.history.rewind(steps)
+        if snap is None:
+            return
+        restore(self, snap)
+        self.motion.clear()
+        self.forget_waves_after(snap['tick'])
+
+    def restart_from_wave(self, wave):
+        """回到第 wave 波开始时的状态，不必从头重开再重放。"""
+        snap = self.wave_starts.get(wave)
+        if snap is None:
+            return
+        restore(self, snap)
+        self.motion.clear()
+        self.history.clear()
+        self.history.push(snap)
+        self.forget_waves_after(snap['tick'])
+
+    def forget_waves_after(self, tick):
+        for wave, snap in list(self.wave_starts.items()):
+            if snap['tick'] > tick:
+                del self.wave_starts[wave]
+
+    def load(self, path):
+        """从存档恢复；草坪尺寸不同时保持当前对局。"""
+        try:
+            restore(self, load_snapshot(path))
+        except (OSError, ValueError) as e:
+            self.show_notice(f"无法读取存档: {e}")
+            return
+        self.motion.clear()
+        self.history.clear()
+        self.wave_starts.clear()
+
+    def show_notice(self, text):
+        """在顶部显示一行提示，NOTICE_TIME 秒后消失。"""
+        self.notice = text
+        self.notice_until = time.perf_counter() + NOTICE_TIME
+
+    def update_replay(self, player, elapsed=None, budget=1 / RENDER_FPS):
+        """回放时与 update 一样按真实时间推进，到点的操作由 player 施加。"""
+        if self.game_over or self.game_win:
+            self.freeze_motion()
+            # 结束后的操作(如重开)不等待步数，随即施加
+            player.step(0)
+            return
+        if self.speed is None:
+            self.motion.clear()
+            deadline = time.perf_counter() + budget
+            while player.step(SPEED_STEPS[-2]) and time.perf_counter() < deadline:
+                pass
+            return
+        if elapsed is None:
+            ticks = self.speed
+        else:
+            self.accumulator += min(elapsed, MAX_FRAME_TIME) * self.speed
+            ticks = int(self.accumulator / TICK_TIME)
+            self.accumulator -= ticks * TICK_TIME
+        if ticks:
+            player.step(ticks - 1)
+            self.motion.capture(self)
+            player.step(1)
+        if self.game_over or self.game_win:
+            self.freeze_motion()
+            return
+        self.motion.alpha = 1.0 if elapsed is None else self.accumulator / TICK_TIME
+
+    def draw(self, surface):
+        self.renderer.draw(surface, self)
 
 # 主函数
 def main():
-    game = PlantsVsZombies()
+    parser = argparse.ArgumentParser(description='植物大战僵尸')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='只重绘变化区域(适合低配机器)')
+    parser.add_argument('--fps', type=int, default=RENDER_FPS,
+                        help='绘制帧率上限，不影响游戏速度')
+    parser.add_argument('--rows', type=int, default=GRID_ROWS, help='草坪行数(耐力模式可用更大的草坪)')
+    parser.add_argument('--cols', type=int, default=GRID_COLS, help='草坪列数，超出窗口时用方向键滚动')
+    parser.add_argument('--record', metavar='PATH', help='把种子与操作录制到回放文件')
+    parser.add_argument('--replay', metavar='PATH', help='回放录制的文件(F 键快进)')
+    parser.add_argument('--save-file', metavar='PATH', default=DEFAULT_SAVE_PATH,
+                        help='F5 存档、F9 读档使用的文件')
+    parser.add_argument('--resume', metavar='PATH', help='从存档继续')
+    parser.add_argument('--font', metavar='PATH',
+                        help=f'字体文件；默认使用 {RESOURCE_DIR} 中的 font.ttf，没有时查找系统的 SimHei')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='统计各阶段耗时，退出时写入 .json 或 .csv 报告(F3 显示统计)')
+    args = parser.parse_args()
+    # 回放文件从种子开始重放操作，记不下存档中的对局状态
+    if args.resume and args.record:
+        parser.error('--record 不能与 --resume 同时使用')
+
+    if args.font:
+        set_font_file(args.font)
+    screen = init_display()
+    renderer = DirtyRectRenderer() if args.dirty_rects else None
+    player = None
+    if args.replay:
+        log = InputLog.load(args.replay)
+        game = PlantsVsZombies(log.seed, renderer, log.rows, log.cols)
+        player = ReplayPlayer(game, log)
+    elif args.resume:
+        try:
+            snap = load_snapshot(args.resume)
+        except (OSError, ValueError) as e:
+            parser.error(f"无法读取存档: {e}")
+        rows, cols = snap['board']
+        game = PlantsVsZombies(snap['sim'][0], renderer, rows, cols)
+        restore(game, snap)
+    else:
+        game = PlantsVsZombies(renderer=renderer, rows=args.rows, cols=args.cols)
+    game.save_path = args.save_file
+    if args.record:
+        game.recorder = InputLog(game.seed, game.board.rows, game.board.cols)
+    if args.profile:
+        game.profiler = FrameProfiler()
+        game.profiler.attach(game)
     running = True
-    
+    elapsed = 0.0
+    # 不限速时每帧的模拟时间预算，与绘制帧率上限一致；--fps 0 表示不限帧率，沿用默认预算
+    budget = 1 / (args.fps or RENDER_FPS)
+
     while running:
-        running = game.handle_events()
-        game.update()
+        if player is None:
+            running = game.handle_events()
+            game.update(elapsed, budget)
+        else:
+            running = game.handle_replay_events()
+            game.update_replay(player, elapsed, budget)
         game.draw(screen)
-        clock.tick(FPS)
-    
+        if game.profiler is None:
+            elapsed = clock.tick(args.fps) / 1000
+        else:
+            elapsed = game.profiler.call('tick', clock.tick, args.fps) / 1000
+            game.profiler.end_frame()
+
+    if args.profile:
+        game.profiler.write_report(args.profile)
+    if args.record:
+        game.recorder.add(game.clock.ticks, OP_END)
+        game.recorder.save(args.record)
     pygame.quit()
     sys.exit()
 